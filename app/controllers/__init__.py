@@ -1,2 +1,9 @@
-from .auth import router as auth
-from .posts import router as posts
+from .admin import router as admin
+from .analytics import router as analytics
+from .auth import router as auth
+from .health import router as health
+from .jwks import router as jwks
+from .metrics import router as metrics
+from .posts import router as posts
+from .stats import router as stats
+from .users import router as users
@@ -0,0 +1,186 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from fastapi import APIRouter, status, Security, Depends, Query, Path, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncResult
+
+from .. import config
+from ..database.connection import async_session, get_session, get_read_session
+from ..dependencies import HTTPBearerScheme
+from ..models.jobs import BulkJobs
+from ..models.posts import Posts
+from ..models.users import Users
+from ..pkg import Hashlibrary
+from ..pkg.bulk import MEDIA_TYPES, encode_ndjson, encode_csv, read_records
+from ..pkg.cryptography import PayloadSchema
+from ..pkg.jobs import Job
+from ..responses import HTTPError
+
+
+async def require_admin(payload: PayloadSchema = Security(HTTPBearerScheme)) -> PayloadSchema:
+    if payload.user_id not in config.ADMIN_USER_IDS:
+        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="not enough permission")
+    return payload
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Security(require_admin)])
+
+TABLE_PATTERN = "^(posts|users)$"
+FORMAT_PATTERN = "^(ndjson|csv)$"
+
+saving: set[asyncio.Task] = set()
+
+
+def parse_datetime(value: str | None) -> datetime:
+    if not value:
+        return datetime.utcnow()
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo is None else parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def required(record: dict, name: str) -> str:
+    value = record.get(name)
+    if value is None or value == "":
+        raise ValueError(f"missing {name}")
+    return str(value)
+
+
+def password_hash(record: dict) -> str:
+    value = required(record, "password")
+    if not Hashlibrary.is_password_hash(value):
+        raise ValueError("password must be a scrypt or legacy sha3 hash")
+    return value
+
+
+def post_record(ord: int, record: dict) -> tuple:
+    return (
+        ord,
+        int(required(record, "user_id")),
+        required(record, "title"),
+        str(record.get("description") or ""),
+        int(record.get("like_count") or 0),
+        int(record.get("dislike_count") or 0),
+        parse_datetime(record.get("created_at")),
+    )
+
+
+def user_record(ord: int, record: dict) -> tuple:
+    return (
+        ord,
+        required(record, "username"),
+        required(record, "full_name"),
+        required(record, "email"),
+        password_hash(record),
+        parse_datetime(record.get("created_at")),
+    )
+
+
+EXPORTERS = {"posts": Posts.stream_export, "users": Users.stream_export}
+IMPORTERS = {"posts": (post_record, Posts.import_posts), "users": (user_record, Users.import_users)}
+
+
+async def save_job(job: Job, force: bool = True):
+    if force or job.due(config.BULK_JOBS_SAVE_INTERVAL):
+        async with async_session() as session:
+            await BulkJobs.save_job(session, job)
+
+
+def save_job_later(job: Job):
+    task = asyncio.get_running_loop().create_task(save_job(job))
+    saving.add(task)
+    task.add_done_callback(saving.discard)
+
+
+async def start_job(kind: str, table: str, format: str) -> Job:
+    job = Job(kind, table, format)
+    async with async_session() as session:
+        await BulkJobs.prune_jobs(session, keep=config.BULK_JOBS_HISTORY)
+        await BulkJobs.save_job(session, job)
+    return job
+
+
+async def stream_export(rows: AsyncResult, format: str, job: Job) -> AsyncIterator[str]:
+    try:
+        columns = list(rows.keys())
+        if format == "csv":
+            yield encode_csv(columns, [])
+        async for partition in rows.partitions(config.BULK_EXPORT_CHUNK_SIZE):
+            yield encode_ndjson(columns, partition) if format == "ndjson" else encode_csv(None, partition)
+            job.advance(len(partition))
+            await save_job(job, force=False)
+    except BaseException as e:
+        job.fail(str(e) or type(e).__name__)
+        save_job_later(job)
+        raise
+    job.finish()
+    await save_job(job)
+
+
+@router.get("/export/{table}", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def export_table(
+    table: str = Path(regex=TABLE_PATTERN),
+    format: str = Query(default="ndjson", regex=FORMAT_PATTERN),
+    session: AsyncSession = Depends(get_read_session),
+):
+    job = await start_job("export", table, format)
+    rows = await EXPORTERS[table](session, chunk_size=config.BULK_EXPORT_CHUNK_SIZE)
+    headers = {"Content-Disposition": f'attachment; filename="{table}.{format}"', "X-Job-Id": job.id}
+    return StreamingResponse(stream_export(rows, format, job), media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.post("/import/{table}", status_code=status.HTTP_200_OK)
+async def import_table(
+    request: Request,
+    table: str = Path(regex=TABLE_PATTERN),
+    format: str = Query(default="ndjson", regex=FORMAT_PATTERN),
+    on_conflict: str = Query(default="skip", regex="^(skip|update)$"),
+    session: AsyncSession = Depends(get_session),
+) -> dict:
+    job = await start_job("import", table, format)
+    to_record, merge = IMPORTERS[table]
+
+    try:
+        async for batch in read_records(request.stream(), format, config.BULK_IMPORT_BATCH_SIZE):
+            records = []
+            for ord, record in enumerate(batch, start=job.rows + 1):
+                try:
+                    records.append(to_record(ord, record))
+                except (ValueError, TypeError) as e:
+                    raise ValueError(f"record {ord}: {e}")
+            inserted, updated = await merge(session, records, update=on_conflict == "update")
+            if table == "posts":
+                await Posts.ensure_headroom(session, size=config.POSTS_PARTITION_SIZE, ahead=config.POSTS_PARTITIONS_AHEAD)
+            job.advance(len(records), inserted, updated)
+            await save_job(job, force=False)
+    except ValueError as e:
+        job.fail(str(e))
+        await save_job(job)
+        raise HTTPError(status=status.HTTP_400_BAD_REQUEST, message="invalid import data", error=str(e))
+    except DBAPIError as e:
+        job.fail(str(e.orig))
+        await save_job(job)
+        raise HTTPError(status=status.HTTP_400_BAD_REQUEST, message="import rejected by database", error=str(e.orig))
+    except BaseException as e:
+        job.fail(str(e) or type(e).__name__)
+        save_job_later(job)
+        raise
+
+    job.finish()
+    await save_job(job)
+    return job.dump()
+
+
+@router.get("/jobs", status_code=status.HTTP_200_OK)
+async def get_jobs(session: AsyncSession = Depends(get_session)) -> list[dict]:
+    return [job.dump() for job in await BulkJobs.find_jobs(session, limit=config.BULK_JOBS_HISTORY)]
+
+
+@router.get("/jobs/{job_id}", status_code=status.HTTP_200_OK)
+async def get_job(job_id: str, session: AsyncSession = Depends(get_session)) -> dict:
+    job = await BulkJobs.find_job(session, job_id=job_id)
+    if job is None:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="job is not exist")
+    return job.dump()
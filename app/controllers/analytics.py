@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import ujson
+from fastapi import APIRouter, status, Security, Depends, Query
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import config
+from ..database.connection import get_read_session
+from ..dependencies import HTTPBearerScheme
+from ..models.analytics import ReactionAnalytics
+from ..models.posts import Posts
+from ..pkg.cryptography import PayloadSchema
+from ..responses import HTTPError, RawJSONResponse
+from ..schemas.analytics import ReactionSeriesSchema
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+BUCKET_SIZES = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEFAULT_WINDOWS = {"minute": timedelta(hours=1), "hour": timedelta(days=7), "day": timedelta(days=30)}
+GRANULARITY_PATTERN = "^(minute|hour|day)$"
+
+
+def as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def series_window(granularity: str, since: datetime | None, until: datetime | None) -> tuple[datetime, datetime]:
+    until = as_utc(until) if until else datetime.utcnow()
+    since = as_utc(since) if since else until - DEFAULT_WINDOWS[granularity]
+    if since >= until:
+        raise HTTPError(status=status.HTTP_400_BAD_REQUEST, message="since must be earlier than until")
+    if (until - since) / BUCKET_SIZES[granularity] > config.ANALYTICS_MAX_BUCKETS:
+        raise HTTPError(status=status.HTTP_400_BAD_REQUEST, message=f"window spans more than {config.ANALYTICS_MAX_BUCKETS} {granularity} buckets")
+    return since, until
+
+
+def render_series(granularity: str, since: datetime, until: datetime, rows) -> Response:
+    data = {
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "buckets": [{"bucket": row.bucket.isoformat(), "likes": row.likes, "dislikes": row.dislikes} for row in rows],
+    }
+    return RawJSONResponse(ujson.dumps(data).encode())
+
+
+@router.get("/reactions", status_code=status.HTTP_200_OK, response_model=ReactionSeriesSchema)
+async def get_my_reactions_series(
+    granularity: str = Query(default="hour", regex=GRANULARITY_PATTERN),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    payload: PayloadSchema = Security(HTTPBearerScheme),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    since, until = series_window(granularity, since, until)
+    rows = await ReactionAnalytics.find_author_series(session, author_id=payload.user_id, granularity=granularity, since=since, until=until)
+    return render_series(granularity, since, until, rows)
+
+
+@router.get("/reactions/{post_id}", status_code=status.HTTP_200_OK, response_model=ReactionSeriesSchema)
+async def get_post_reactions_series(
+    post_id: int,
+    granularity: str = Query(default="hour", regex=GRANULARITY_PATTERN),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    payload: PayloadSchema = Security(HTTPBearerScheme),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    since, until = series_window(granularity, since, until)
+    post = await Posts.get_post(session, post_id=post_id)
+
+    if not post:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
+
+    if post.user_id != payload.user_id:
+        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="not enough permission")
+
+    rows = await ReactionAnalytics.find_post_series(session, post_id=post.id, granularity=granularity, since=since, until=until)
+    return render_series(granularity, since, until, rows)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Request, status
+
+from ..responses import HTTPError, HTTPSuccess
+
+router = APIRouter(tags=["Other"])
+
+
+@router.get("/health", status_code=status.HTTP_200_OK)
+async def get_health():
+    return HTTPSuccess(status=status.HTTP_200_OK, data="alive")
+
+
+@router.get("/ready", status_code=status.HTTP_200_OK)
+async def get_readiness(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPError(status=status.HTTP_503_SERVICE_UNAVAILABLE, message="warming up")
+    return HTTPSuccess(status=status.HTTP_200_OK, data="ready")
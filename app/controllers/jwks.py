@@ -0,0 +1,21 @@
+import ujson
+from fastapi import APIRouter, Request, status
+from fastapi.responses import Response
+
+from .. import config
+from ..pkg import JWT
+from ..responses import RawJSONResponse
+from ..responses.conditional import make_etag, is_not_modified
+
+router = APIRouter(tags=["Auth"])
+
+JWKS = ujson.dumps(JWT.jwks())
+JWKS_ETAG = make_etag(JWKS)
+
+
+@router.get("/.well-known/jwks.json", status_code=status.HTTP_200_OK)
+async def get_jwks(request: Request):
+    headers = {"ETag": JWKS_ETAG, "Cache-Control": f"public, max-age={config.JWKS_MAX_AGE}"}
+    if is_not_modified(request, JWKS_ETAG, None):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return RawJSONResponse(JWKS.encode(), headers=headers)
@@ -1,100 +1,406 @@
-from fastapi import APIRouter, status, Security, Depends, Query
-from sqlalchemy.exc import IntegrityError, NoResultFound
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from ..database.connection import get_session
-from ..dependencies import HTTPBearerScheme
-from ..models.posts import Posts
-from ..pkg.cryptography import PayloadSchema
-from ..responses import HTTPError
-from ..schemas.posts import PostResponseSchema, CreatePostSchema, UpdatePostSchema
-
-router = APIRouter(prefix="/posts", tags=["Posts"])
-
-
-@router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_post(
-    body: CreatePostSchema, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)
-) -> PostResponseSchema:
-    try:
-        post = await Posts.create_post(session, user_id=payload.user_id, **body.dict())
-    except IntegrityError as e:
-        raise HTTPError(status=status.HTTP_409_CONFLICT, message="post is exist", error=str(e.orig).split("DETAIL:  ")[1])
-
-    return PostResponseSchema(**post.__dict__)
-
-
-@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)])
-async def get_posts(payload: PayloadSchema = Security(HTTPBearerScheme), user_id: int | None = Query(default=None), session: AsyncSession = Depends(get_session)) -> list[PostResponseSchema]:
-    if not user_id:
-        user_id = payload.user_id
-
-    posts = await Posts.find_posts(session, user_id=user_id)
-
-    if not posts:
-        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="user not have posts")
-
-    return [PostResponseSchema(**post.__dict__) for post in posts]
-
-
-@router.get("/{post_id}", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)])
-async def get_post(post_id: int, session: AsyncSession = Depends(get_session)) -> PostResponseSchema:
-    post = await Posts.find_post(session, post_id=post_id)
-    if not post:
-        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
-
-    return PostResponseSchema(**post.__dict__)
-
-
-@router.put("/{post_id}", status_code=status.HTTP_200_OK)
-async def update_post(post_id: int, body: UpdatePostSchema, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> PostResponseSchema:
-    post = await Posts.find_post(session, post_id=post_id)
-
-    if not post:
-        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
-
-    if post.user_id != payload.user_id:
-        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="not enough permission")
-
-    post = await Posts.update_post(session, post, **body.dict())
-
-    return PostResponseSchema(**post.__dict__)
-
-
-@router.delete("/{post_id}", status_code=status.HTTP_200_OK)
-async def delete_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> PostResponseSchema:
-    post = await Posts.find_post(session, post_id=post_id)
-
-    if post.user_id != payload.user_id:
-        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="not enough permission")
-
-    try:
-        await Posts.delete_post(session, post)
-    except NoResultFound as e:
-        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist", error=e.__str__())
-
-    return PostResponseSchema(**post.__dict__)
-
-
-@router.post("/{post_id}/like", status_code=status.HTTP_200_OK)
-async def like_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> PostResponseSchema:
-    post = await Posts.find_post(session, post_id=post_id)
-
-    if post.user_id == payload.user_id:
-        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="cant like yourself post")
-
-    post = await Posts.update_post(session, post, like_count=post.like_count+1)
-
-    return PostResponseSchema(**post.__dict__)
-
-
-@router.post("/{post_id}/dislike", status_code=status.HTTP_200_OK)
-async def dislike_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> PostResponseSchema:
-    post = await Posts.find_post(session, post_id=post_id)
-
-    if post.user_id == payload.user_id:
-        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="cant dislike yourself post")
-
-    post = await Posts.update_post(session, post, dislike_count=post.dislike_count+1)
-
-    return PostResponseSchema(**post.__dict__)
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+import ujson
+from fastapi import APIRouter, status, Security, Depends, Query, Body, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import Receive, Scope, Send
+
+from .. import config
+from ..database.connection import get_session, get_read_session
+from ..dependencies import HTTPBearerScheme
+from ..dependencies.loaders import UserLoader, get_user_loader
+from ..models.posts import Posts
+from ..models.reactions import Reactions, LIKE, DISLIKE
+from ..pkg import ReactionCounter, HotPosts, LiveHub
+from ..pkg.live import Subscription
+from ..pkg.cryptography import PayloadSchema
+from ..pkg.pagination import encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor
+from ..pkg.serialization import compile_encoder
+from ..responses import HTTPError, RawJSONResponse
+from ..responses.conditional import make_etag, validator_headers, is_conditional, is_not_modified, not_modified
+from ..schemas.posts import (
+    PostResponseSchema,
+    PostPageSchema,
+    PostSearchResultSchema,
+    PostSearchPageSchema,
+    PostReactionSchema,
+    BulkCreatePostsSchema,
+    CreatePostSchema,
+    UpdatePostSchema,
+)
+
+router = APIRouter(prefix="/posts", tags=["Posts"])
+
+encode_post = compile_encoder(PostResponseSchema, exclude={"author"})
+encode_search_result = compile_encoder(PostSearchResultSchema, exclude={"author"})
+
+
+def render(data: Any, status_code: int = status.HTTP_200_OK, headers: dict[str, str] | None = None) -> RawJSONResponse:
+    return RawJSONResponse(ujson.dumps(data, ensure_ascii=False).encode(), status_code=status_code, headers=headers)
+
+
+def dump_post(post: Any) -> dict:
+    return ReactionCounter.apply(encode_post(post))
+
+
+async def load_authors(posts: list[Any], users: UserLoader, include: str | None) -> dict[int, dict] | None:
+    if include != "author":
+        return None
+    return await users.load_many(post.user_id for post in posts)
+
+
+async def embed_authors(items: list[dict], users: UserLoader, include: str | None, authors: dict[int, dict] | None = None) -> list[dict]:
+    if include == "author":
+        if authors is None:
+            authors = await users.load_many(item["user_id"] for item in items)
+        for item in items:
+            item["author"] = authors.get(item["user_id"])
+    return items
+
+
+def post_validators(posts: list[Any], extra: str = "", authors: dict[int, dict] | None = None) -> tuple[str, datetime | None]:
+    parts, last_modified = [extra], None
+    for post in posts:
+        likes, dislikes = ReactionCounter.pending(post.id)
+        parts.append(f"{post.id}.{post.version}.{likes}.{dislikes}")
+        modified = max(post.updated_at, ReactionCounter.touched(post.id) or post.updated_at)
+        if last_modified is None or modified > last_modified:
+            last_modified = modified
+    if authors is not None:
+        # profiles carry no version or timestamp, so embedded authors are validated by content only
+        parts.extend(f"{user_id}.{ujson.dumps(authors[user_id], ensure_ascii=False)}" for user_id in sorted(authors))
+        last_modified = None
+    return make_etag("|".join(parts)), last_modified
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=PostResponseSchema)
+async def create_post(
+    body: CreatePostSchema, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)
+) -> Response:
+    try:
+        post = await Posts.create_post(session, user_id=payload.user_id, **body.dict())
+    except IntegrityError as e:
+        raise HTTPError(status=status.HTTP_409_CONFLICT, message="post is exist", error=str(e.orig).split("DETAIL:  ")[1])
+
+    await Posts.ensure_headroom(session, size=config.POSTS_PARTITION_SIZE, ahead=config.POSTS_PARTITIONS_AHEAD, last_id=post.id)
+    HotPosts.offer(post.id, post.like_count, post.dislike_count, post.created_at)
+
+    return render(encode_post(post), status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED, response_model=BulkCreatePostsSchema)
+async def create_posts(
+    body: list[CreatePostSchema] = Body(min_items=1, max_items=config.POSTS_BULK_MAX_SIZE),
+    payload: PayloadSchema = Security(HTTPBearerScheme),
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    rows = await Posts.create_posts(session, user_id=payload.user_id, posts=[item.dict() for item in body])
+    if rows:
+        await Posts.ensure_headroom(session, size=config.POSTS_PARTITION_SIZE, ahead=config.POSTS_PARTITIONS_AHEAD, last_id=max(row.id for row in rows))
+    created = {row.title: row for row in rows}
+
+    result = {"created": [], "conflicts": []}
+    for index, item in enumerate(body):
+        row = created.pop(item.title, None)
+        if row is None:
+            result["conflicts"].append({"index": index, "title": item.title, "error": "post with this title is exist"})
+            continue
+        HotPosts.offer(row.id, row.like_count, row.dislike_count, row.created_at)
+        result["created"].append(encode_post(row))
+
+    return render(result, status_code=status.HTTP_201_CREATED)
+
+
+async def stream_posts_ndjson(posts: AsyncIterator[Any]) -> AsyncIterator[str]:
+    chunk = []
+    async for post in posts:
+        chunk.append(ujson.dumps(dump_post(post), ensure_ascii=False))
+        if len(chunk) >= config.POSTS_STREAM_CHUNK_SIZE:
+            yield "\n".join(chunk) + "\n"
+            chunk.clear()
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)], response_model=PostPageSchema)
+async def get_posts(
+    request: Request,
+    payload: PayloadSchema = Security(HTTPBearerScheme),
+    user_id: int | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=config.POSTS_PAGE_SIZE, ge=1, le=config.POSTS_PAGE_MAX_SIZE),
+    stream: bool = Query(default=False),
+    include: str | None = Query(default=None, regex="^author$"),
+    session: AsyncSession = Depends(get_read_session),
+    users: UserLoader = Depends(get_user_loader),
+) -> Response:
+    if not user_id:
+        user_id = payload.user_id
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPError(status=status.HTTP_400_BAD_REQUEST, message="invalid cursor", error=e.__str__())
+
+    if stream:
+        posts = await Posts.stream_posts(session, user_id=user_id, after=after, chunk_size=config.POSTS_STREAM_CHUNK_SIZE)
+        return StreamingResponse(stream_posts_ndjson(posts), media_type="application/x-ndjson")
+
+    if is_conditional(request):
+        versions = await Posts.find_posts_versions(session, user_id=user_id, limit=limit + 1, after=after)
+        authors = await load_authors(versions[:limit], users, include)
+        etag, last_modified = post_validators(versions[:limit], extra=f"{len(versions) > limit}.{include}", authors=authors)
+        if versions and is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+    posts = await Posts.find_posts(session, user_id=user_id, limit=limit + 1, after=after)
+
+    if not posts and not cursor:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="user not have posts")
+
+    authors = await load_authors(posts[:limit], users, include)
+    etag, last_modified = post_validators(posts[:limit], extra=f"{len(posts) > limit}.{include}", authors=authors)
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+
+    items = await embed_authors([dump_post(post) for post in posts], users, include, authors=authors)
+    return render({"items": items, "next_cursor": next_cursor}, headers=validator_headers(etag, last_modified))
+
+
+@router.get("/hot", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)], response_model=list[PostResponseSchema])
+async def get_hot_posts(
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=config.POSTS_PAGE_SIZE, ge=1, le=config.POSTS_PAGE_MAX_SIZE),
+    include: str | None = Query(default=None, regex="^author$"),
+    session: AsyncSession = Depends(get_read_session),
+    users: UserLoader = Depends(get_user_loader),
+) -> Response:
+    ids = HotPosts.page(offset=offset, limit=limit)
+    posts = {post.id: post for post in await Posts.get_posts_by_ids(session, ids=ids)}
+
+    return render(await embed_authors([dump_post(posts[post_id]) for post_id in ids if post_id in posts], users, include))
+
+
+@router.get("/search", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)], response_model=PostSearchPageSchema)
+async def search_posts(
+    q: str = Query(min_length=1, max_length=256),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=config.POSTS_PAGE_SIZE, ge=1, le=config.POSTS_PAGE_MAX_SIZE),
+    include: str | None = Query(default=None, regex="^author$"),
+    session: AsyncSession = Depends(get_read_session),
+    users: UserLoader = Depends(get_user_loader),
+) -> Response:
+    try:
+        after = decode_rank_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPError(status=status.HTTP_400_BAD_REQUEST, message="invalid cursor", error=e.__str__())
+
+    rows = await Posts.search_posts(session, query=q, limit=limit + 1, after=after)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_rank_cursor(rows[-1].rank, rows[-1].id)
+
+    items = await embed_authors([ReactionCounter.apply(encode_search_result(row)) for row in rows], users, include)
+    return render({"items": items, "next_cursor": next_cursor})
+
+
+@router.get("/batch", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)], response_model=list[PostResponseSchema])
+async def get_posts_batch(
+    request: Request,
+    ids: list[int] = Query(min_items=1, max_items=config.POSTS_BATCH_MAX_SIZE),
+    include: str | None = Query(default=None, regex="^author$"),
+    session: AsyncSession = Depends(get_read_session),
+    users: UserLoader = Depends(get_user_loader),
+) -> Response:
+    ids = list(dict.fromkeys(ids))
+    posts = {post.id: post for post in await Posts.get_posts_by_ids(session, ids=ids)}
+    posts = [posts[post_id] for post_id in ids if post_id in posts]
+
+    if not posts:
+        return render([])
+
+    authors = await load_authors(posts, users, include)
+    etag, last_modified = post_validators(posts, extra=str(include), authors=authors)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    items = await embed_authors([dump_post(post) for post in posts], users, include, authors=authors)
+    return render(items, headers=validator_headers(etag, last_modified))
+
+
+@router.get("/reactions", status_code=status.HTTP_200_OK, response_model=list[PostReactionSchema])
+async def get_my_reactions(
+    ids: list[int] = Query(min_items=1, max_items=config.POSTS_BATCH_MAX_SIZE),
+    payload: PayloadSchema = Security(HTTPBearerScheme),
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    reactions = await Reactions.get_user_reactions(session, user_id=payload.user_id)
+    return render([{"post_id": post_id, "reaction": reactions.get(post_id)} for post_id in dict.fromkeys(ids)])
+
+
+def live_event(post_id: int, data: dict) -> str:
+    return "event: post\ndata: " + ujson.dumps({"id": post_id, **data}, ensure_ascii=False) + "\n\n"
+
+
+async def stream_live(subscription: Subscription, snapshot: list[dict]) -> AsyncIterator[str]:
+    if snapshot:
+        yield "".join(live_event(item["id"], item) for item in snapshot)
+    while True:
+        updates = await subscription.next(timeout=config.POSTS_LIVE_HEARTBEAT)
+        yield "".join(live_event(post_id, data) for post_id, data in updates.items()) if updates else ": ping\n\n"
+
+
+class LiveResponse(StreamingResponse):
+    def __init__(self, subscription: Subscription, snapshot: list[dict]):
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        super().__init__(stream_live(subscription, snapshot), media_type="text/event-stream", headers=headers)
+        self.subscription = subscription
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            LiveHub.unsubscribe(self.subscription)
+
+
+@router.get("/stream", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def stream_posts_live(
+    ids: list[int] = Query(min_items=1, max_items=config.POSTS_LIVE_MAX_IDS),
+    payload: PayloadSchema = Security(HTTPBearerScheme),
+    session: AsyncSession = Depends(get_read_session),
+):
+    ids = list(dict.fromkeys(ids))
+    if LiveHub.owner_full(payload.user_id):
+        raise HTTPError(status=status.HTTP_429_TOO_MANY_REQUESTS, message="too many live streams for this user", headers={"Retry-After": "5"})
+    subscription = LiveHub.subscribe(ids, owner=payload.user_id)
+    if subscription is None:
+        raise HTTPError(status=status.HTTP_503_SERVICE_UNAVAILABLE, message="too many live subscribers", headers={"Retry-After": "5"})
+
+    try:
+        posts = await Posts.get_posts_by_ids(session, ids=ids)
+        await session.close()
+    except BaseException:
+        LiveHub.unsubscribe(subscription)
+        raise
+
+    return LiveResponse(subscription, [encode_post(post) for post in posts])
+
+
+@router.get("/{post_id}", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)], response_model=PostResponseSchema)
+async def get_post(
+    post_id: int,
+    request: Request,
+    include: str | None = Query(default=None, regex="^author$"),
+    session: AsyncSession = Depends(get_read_session),
+    users: UserLoader = Depends(get_user_loader),
+) -> Response:
+    if is_conditional(request):
+        version = await Posts.get_post_version(session, post_id=post_id)
+        if version:
+            authors = await load_authors([version], users, include)
+            etag, last_modified = post_validators([version], extra=str(include), authors=authors)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+    post = await Posts.get_post(session, post_id=post_id)
+    if not post:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
+
+    authors = await load_authors([post], users, include)
+    etag, last_modified = post_validators([post], extra=str(include), authors=authors)
+    item, = await embed_authors([dump_post(post)], users, include, authors=authors)
+    return render(item, headers=validator_headers(etag, last_modified))
+
+
+@router.put("/{post_id}", status_code=status.HTTP_200_OK, response_model=PostResponseSchema)
+async def update_post(post_id: int, body: UpdatePostSchema, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> Response:
+    post = await Posts.find_post(session, post_id=post_id)
+
+    if not post:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
+
+    if post.user_id != payload.user_id:
+        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="not enough permission")
+
+    post = await Posts.update_post(session, post, **body.dict())
+    LiveHub.publish(post.id, **encode_post(post))
+    data = dump_post(post)
+
+    return render(data)
+
+
+@router.delete("/{post_id}", status_code=status.HTTP_200_OK, response_model=PostResponseSchema)
+async def delete_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> Response:
+    post = await Posts.find_post(session, post_id=post_id)
+
+    if not post:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
+
+    if post.user_id != payload.user_id:
+        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message="not enough permission")
+
+    try:
+        await Posts.delete_post(session, post)
+    except NoResultFound as e:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist", error=e.__str__())
+
+    data = dump_post(post)
+    ReactionCounter.discard(post.id)
+    HotPosts.remove(post.id)
+    LiveHub.publish(post.id, deleted=True)
+
+    return render(data)
+
+
+SELF_REACTION_MESSAGES = {LIKE: "cant like yourself post", DISLIKE: "cant dislike yourself post", 0: "cant react to yourself post"}
+
+
+async def react_to_post(post_id: int, user_id: int, value: int, session: AsyncSession) -> Response:
+    post = await Posts.get_post(session, post_id=post_id)
+
+    if not post:
+        raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist")
+
+    if post.user_id == user_id:
+        raise HTTPError(status=status.HTTP_401_UNAUTHORIZED, message=SELF_REACTION_MESSAGES[value])
+
+    if value:
+        try:
+            change = await Reactions.react(session, user_id=user_id, post_id=post.id, value=value)
+        except IntegrityError as e:
+            raise HTTPError(status=status.HTTP_404_NOT_FOUND, message="post is not exist", error=str(e.orig))
+    else:
+        previous = await Reactions.unreact(session, user_id=user_id, post_id=post.id)
+        change = (previous, 0) if previous else None
+
+    if change is not None:
+        previous, current = change
+        ReactionCounter.add(post.id, likes=(current == LIKE) - (previous == LIKE), dislikes=(current == DISLIKE) - (previous == DISLIKE))
+
+    data = dump_post(post)
+    HotPosts.offer(post.id, data["like_count"], data["dislike_count"], post.created_at)
+
+    return render(data)
+
+
+@router.post("/{post_id}/like", status_code=status.HTTP_200_OK, response_model=PostResponseSchema)
+async def like_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> Response:
+    return await react_to_post(post_id, user_id=payload.user_id, value=LIKE, session=session)
+
+
+@router.post("/{post_id}/dislike", status_code=status.HTTP_200_OK, response_model=PostResponseSchema)
+async def dislike_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> Response:
+    return await react_to_post(post_id, user_id=payload.user_id, value=DISLIKE, session=session)
+
+
+@router.delete("/{post_id}/reaction", status_code=status.HTTP_200_OK, response_model=PostResponseSchema)
+async def unreact_post(post_id: int, payload: PayloadSchema = Security(HTTPBearerScheme), session: AsyncSession = Depends(get_session)) -> Response:
+    return await react_to_post(post_id, user_id=payload.user_id, value=0, session=session)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, status
+
+from ..database.connection import pool_stats
+from ..pkg import PostsCache
+
+router = APIRouter(prefix="/stats", tags=["Other"])
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK)
+async def get_cache_stats() -> dict[str, dict[str, int]]:
+    return {"posts": PostsCache.stats()}
+
+
+@router.get("/database", status_code=status.HTTP_200_OK)
+async def get_database_stats() -> dict[str, dict[str, int | float]]:
+    return pool_stats()
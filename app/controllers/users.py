@@ -0,0 +1,20 @@
+import ujson
+from fastapi import APIRouter, status, Security, Depends, Query
+from fastapi.responses import Response
+
+from .. import config
+from ..dependencies import HTTPBearerScheme
+from ..dependencies.loaders import UserLoader, get_user_loader
+from ..responses import RawJSONResponse
+from ..schemas.users import UserProfileSchema
+
+router = APIRouter(prefix="/users", tags=["Users"])
+
+
+@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Security(HTTPBearerScheme)], response_model=list[UserProfileSchema])
+async def get_users_batch(
+    ids: list[int] = Query(min_items=1, max_items=config.USERS_BATCH_MAX_SIZE),
+    users: UserLoader = Depends(get_user_loader),
+) -> Response:
+    profiles = await users.load_many(ids)
+    return RawJSONResponse(ujson.dumps([profiles[user_id] for user_id in dict.fromkeys(ids) if user_id in profiles], ensure_ascii=False).encode())
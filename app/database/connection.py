@@ -1,22 +1,90 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-
-from app.config import DATABASE_URI
-
-engine = create_async_engine(DATABASE_URI, echo=False)
-Base = declarative_base()
-Base.metadata.bind = engine
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-
-async def init_models():
-    async with engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-
-
-async def get_session() -> AsyncSession:
-    async with async_session() as session:
-        yield session
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from app.config import (
+    DATABASE_URI,
+    DATABASE_REPLICA_URI,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from .instrumentation import instrument_engine
+from .pool import InstrumentedQueuePool
+from ..pkg.metrics import registry
+
+
+def create_engine(uri: str) -> AsyncEngine:
+    return create_async_engine(
+        uri,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    )
+
+
+engine = create_engine(DATABASE_URI)
+read_engine = create_engine(DATABASE_REPLICA_URI) if DATABASE_REPLICA_URI else engine
+instrument_engine(engine, "primary")
+if read_engine is not engine:
+    instrument_engine(read_engine, "replica")
+Base = declarative_base()
+Base.metadata.bind = engine
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async_read_session = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_session() -> AsyncSession:
+    async with async_session() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncSession:
+    async with async_read_session() as session:
+        yield session
+
+
+def pool_stats() -> dict[str, dict[str, int | float]]:
+    stats = {"primary": engine.sync_engine.pool.snapshot()}
+    if read_engine is not engine:
+        stats["replica"] = read_engine.sync_engine.pool.snapshot()
+    return stats
+
+
+async def warm_up(connections: int):
+    async def connect(warmed: AsyncEngine):
+        async with warmed.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+    engines = {engine, read_engine}
+    await asyncio.gather(*(connect(warmed) for warmed in engines for _ in range(connections)))
+
+
+def pool_waiting() -> int:
+    waiting = engine.sync_engine.pool.stats.waiting
+    if read_engine is not engine:
+        waiting += read_engine.sync_engine.pool.stats.waiting
+    return waiting
+
+
+POOL_GAUGES = ("size", "idle", "overflow", "checked_out", "waiting", "saturation")
+POOL_COUNTERS = ("checkouts", "timeouts")
+
+
+def _pool_metric(key: str):
+    return lambda: [((name,), stats[key]) for name, stats in pool_stats().items()]
+
+
+for key in POOL_GAUGES:
+    registry.gauge(f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}.", ("engine",), collect=_pool_metric(key))
+for key in POOL_COUNTERS:
+    registry.counter(f"db_pool_{key}_total", f"Connection pool {key} since start.", ("engine",), collect=_pool_metric(key))
@@ -0,0 +1,15 @@
+import asyncpg
+from sqlalchemy import Table
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+
+
+async def copy_to_staging(session: AsyncSession, staging: Table, records: list[tuple]):
+    await session.execute(CreateTable(staging))
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    try:
+        await raw.driver_connection.copy_records_to_table(staging.name, records=records, columns=[column.name for column in staging.columns])
+    except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+        raise DBAPIError(f"COPY {staging.name}", None, e) from e
@@ -1,4 +1,4 @@
-from sqlalchemy.exc import IntegrityError
-
-class DuplicateError(IntegrityError):
-    pass
+from sqlalchemy.exc import IntegrityError
+
+class DuplicateError(IntegrityError):
+    pass
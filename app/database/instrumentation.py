@@ -0,0 +1,31 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..pkg.metrics import request_queries, db_query_duration, db_query_errors
+
+
+def _statement_kind(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        db_query_duration.observe(elapsed, name, _statement_kind(statement))
+        stats = request_queries.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        db_query_errors.inc(name, _statement_kind(context.statement or ""))
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import asyncpg
+
+from app.config import DATABASE_URI, POSTS_PARTITION_SIZE
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = Path(__file__).parent / "versions"
+ADVISORY_LOCK_ID = 7_318_420_215
+NO_TRANSACTION = "-- migrate: no-transaction"
+SETTINGS = {"app.posts_partition_size": str(POSTS_PARTITION_SIZE)}
+
+
+class Migration:
+    def __init__(self, path: Path):
+        version, _, name = path.stem.partition("_")
+        self.version = int(version)
+        self.name = name
+        self.path = path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text()
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.startswith(NO_TRANSACTION)
+
+    def statements(self) -> list[str]:
+        lines = [line for line in self.sql.splitlines() if not line.lstrip().startswith("--")]
+        return [statement.strip() for statement in "\n".join(lines).split(";\n") if statement.strip()]
+
+
+def discover() -> list[Migration]:
+    return sorted((Migration(path) for path in VERSIONS_DIR.glob("*.sql")), key=lambda migration: migration.version)
+
+
+def asyncpg_dsn(uri: str) -> str:
+    return uri.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def applied_versions(conn: asyncpg.Connection) -> set[int]:
+    await conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version integer PRIMARY KEY, name text NOT NULL, applied_at timestamp NOT NULL DEFAULT now())"
+    )
+    return {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+
+
+async def apply(conn: asyncpg.Connection, migration: Migration):
+    logger.info("applying migration %04d_%s", migration.version, migration.name)
+    if migration.transactional:
+        async with conn.transaction():
+            await conn.execute(migration.sql)
+            await conn.execute("INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", migration.version, migration.name)
+        return
+
+    for statement in migration.statements():
+        await conn.execute(statement)
+    await conn.execute("INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", migration.version, migration.name)
+
+
+async def migrate(uri: str = DATABASE_URI, target: int | None = None) -> list[Migration]:
+    conn = await asyncpg.connect(asyncpg_dsn(uri))
+    try:
+        for name, value in SETTINGS.items():
+            await conn.execute("SELECT set_config($1, $2, false)", name, value)
+        await conn.execute("SELECT pg_advisory_lock($1)", ADVISORY_LOCK_ID)
+        try:
+            applied = await applied_versions(conn)
+            pending = [m for m in discover() if m.version not in applied and (target is None or m.version <= target)]
+            for migration in pending:
+                await apply(conn, migration)
+            return pending
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_ID)
+    finally:
+        await conn.close()
+
+
+async def status(uri: str = DATABASE_URI) -> list[tuple[Migration, bool]]:
+    conn = await asyncpg.connect(asyncpg_dsn(uri))
+    try:
+        applied = await applied_versions(conn)
+    finally:
+        await conn.close()
+    return [(migration, migration.version in applied) for migration in discover()]
@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+import logging
+
+from . import migrate, status
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.database.migrations", description="Apply versioned schema migrations")
+    parser.add_argument("--target", type=int, default=None, help="apply migrations up to and including this version")
+    parser.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.status:
+        for migration, applied in asyncio.run(status()):
+            print(f"{'applied' if applied else 'pending':<8} {migration.version:04d}_{migration.name}")
+        return
+
+    applied = asyncio.run(migrate(target=args.target))
+    print(f"applied {len(applied)} migration(s)")
+
+
+if __name__ == "__main__":
+    main()
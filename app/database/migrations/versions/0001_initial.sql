@@ -0,0 +1,32 @@
+CREATE TABLE IF NOT EXISTS users (
+    id serial PRIMARY KEY,
+    username varchar(64) NOT NULL,
+    full_name varchar(64) NOT NULL,
+    email varchar(64) NOT NULL,
+    password varchar(128) NOT NULL,
+    created_at timestamp without time zone
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id serial PRIMARY KEY,
+    user_id integer,
+    title text,
+    description text,
+    like_count integer,
+    dislike_count integer,
+    created_at timestamp without time zone
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_posts_title ON posts (title);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id serial PRIMARY KEY,
+    user_id integer,
+    token varchar(512),
+    created_at timestamp without time zone
+);
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS expires_at timestamp without time zone;
+UPDATE sessions SET expires_at = created_at + interval '7 days' WHERE expires_at IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions (user_id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_sessions_token ON sessions (token);
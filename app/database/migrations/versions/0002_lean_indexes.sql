@@ -0,0 +1,16 @@
+-- migrate: no-transaction
+-- Drop the per-column indexes create_all used to add, and index what the queries actually filter and sort on.
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_full_name;
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_password;
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_created_at;
+DROP INDEX CONCURRENTLY IF EXISTS ix_posts_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_posts_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_posts_description;
+DROP INDEX CONCURRENTLY IF EXISTS ix_posts_like_count;
+DROP INDEX CONCURRENTLY IF EXISTS ix_posts_dislike_count;
+DROP INDEX CONCURRENTLY IF EXISTS ix_sessions_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_sessions_created_at;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_user_id_created_at_id ON posts (user_id, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_created_at ON posts (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at) WHERE expires_at IS NOT NULL;
@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector);
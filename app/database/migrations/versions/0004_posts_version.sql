@@ -0,0 +1,2 @@
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1;
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS updated_at timestamp without time zone NOT NULL DEFAULT (now() AT TIME ZONE 'utc');
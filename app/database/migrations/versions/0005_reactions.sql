@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS reactions (
+    user_id integer NOT NULL,
+    post_id integer NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    value smallint NOT NULL CHECK (value IN (-1, 1)),
+    created_at timestamp without time zone NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (user_id, post_id)
+);
+CREATE INDEX IF NOT EXISTS ix_reactions_post_id ON reactions (post_id);
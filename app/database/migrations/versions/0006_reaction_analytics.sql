@@ -0,0 +1,29 @@
+CREATE TABLE IF NOT EXISTS reaction_events (
+    id bigserial PRIMARY KEY,
+    post_id integer NOT NULL,
+    author_id integer NOT NULL,
+    occurred_at timestamp without time zone NOT NULL,
+    likes integer NOT NULL,
+    dislikes integer NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS post_reaction_rollups (
+    post_id integer NOT NULL,
+    granularity text NOT NULL CHECK (granularity IN ('minute', 'hour', 'day')),
+    bucket timestamp without time zone NOT NULL,
+    likes integer NOT NULL DEFAULT 0,
+    dislikes integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (post_id, granularity, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS author_reaction_rollups (
+    author_id integer NOT NULL,
+    granularity text NOT NULL CHECK (granularity IN ('minute', 'hour', 'day')),
+    bucket timestamp without time zone NOT NULL,
+    likes integer NOT NULL DEFAULT 0,
+    dislikes integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (author_id, granularity, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS ix_post_reaction_rollups_granularity_bucket ON post_reaction_rollups (granularity, bucket);
+CREATE INDEX IF NOT EXISTS ix_author_reaction_rollups_granularity_bucket ON author_reaction_rollups (granularity, bucket);
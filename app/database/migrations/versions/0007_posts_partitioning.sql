@@ -0,0 +1,90 @@
+-- Rebuild posts as a table partitioned by RANGE (id), one partition per POSTS_PARTITION_SIZE ids (passed in as app.posts_partition_size).
+-- Titles stay globally unique through post_titles, because a unique index on a partitioned table must include the partition key.
+-- The data is copied in this transaction, so the application must be stopped while this migration runs.
+ALTER TABLE reactions DROP CONSTRAINT IF EXISTS reactions_post_id_fkey;
+ALTER TABLE posts RENAME TO posts_legacy;
+ALTER INDEX posts_pkey RENAME TO posts_legacy_pkey;
+
+CREATE TABLE posts (
+    id integer NOT NULL DEFAULT nextval('posts_id_seq'),
+    user_id integer,
+    title text,
+    description text,
+    like_count integer,
+    dislike_count integer,
+    created_at timestamp without time zone,
+    version integer NOT NULL DEFAULT 1,
+    updated_at timestamp without time zone NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED,
+    CONSTRAINT posts_pkey PRIMARY KEY (id)
+) PARTITION BY RANGE (id);
+
+DO $$
+DECLARE
+    size constant integer := coalesce(nullif(current_setting('app.posts_partition_size', true), '')::integer, 1000000);
+    last_id bigint := greatest((SELECT coalesce(max(id), 0) FROM posts_legacy), (SELECT last_value FROM posts_id_seq));
+    bound bigint := 0;
+BEGIN
+    WHILE bound <= last_id + size LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF posts FOR VALUES FROM (%s) TO (%s)', 'posts_p' || bound, bound, bound + size);
+        bound := bound + size;
+    END LOOP;
+END $$;
+
+INSERT INTO posts (id, user_id, title, description, like_count, dislike_count, created_at, version, updated_at)
+SELECT id, user_id, title, description, like_count, dislike_count, created_at, version, updated_at FROM posts_legacy;
+
+ALTER SEQUENCE posts_id_seq OWNED BY posts.id;
+DROP TABLE posts_legacy;
+
+CREATE INDEX ix_posts_user_id_created_at_id ON posts (user_id, created_at DESC, id DESC);
+CREATE INDEX ix_posts_created_at ON posts (created_at);
+CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector);
+
+CREATE TABLE post_titles (
+    title text PRIMARY KEY,
+    post_id integer NOT NULL
+);
+CREATE INDEX ix_post_titles_post_id ON post_titles (post_id);
+INSERT INTO post_titles (title, post_id) SELECT title, id FROM posts WHERE title IS NOT NULL;
+
+CREATE FUNCTION posts_claim_title() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.title IS NOT DISTINCT FROM OLD.title THEN
+        RETURN NEW;
+    END IF;
+    IF NEW.title IS NOT NULL THEN
+        INSERT INTO post_titles (title, post_id) VALUES (NEW.title, NEW.id) ON CONFLICT (title) DO NOTHING;
+        IF NOT FOUND THEN
+            IF TG_OP = 'INSERT' AND current_setting('app.duplicate_titles', true) = 'skip' THEN
+                RETURN NULL;
+            END IF;
+            RAISE unique_violation USING
+                MESSAGE = 'duplicate key value violates unique constraint "post_titles_pkey"',
+                DETAIL = format('Key (title)=(%s) already exists.', NEW.title),
+                CONSTRAINT = 'post_titles_pkey';
+        END IF;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM post_titles WHERE title = OLD.title AND post_id = OLD.id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION posts_release_title() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM post_titles WHERE title = OLD.title AND post_id = OLD.id;
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_claim_title BEFORE INSERT OR UPDATE OF title ON posts FOR EACH ROW EXECUTE FUNCTION posts_claim_title();
+CREATE TRIGGER posts_release_title AFTER DELETE ON posts FOR EACH ROW EXECUTE FUNCTION posts_release_title();
+
+ALTER TABLE reactions ADD CONSTRAINT reactions_post_id_fkey FOREIGN KEY (post_id) REFERENCES posts (id) ON DELETE CASCADE;
+
+CREATE SCHEMA IF NOT EXISTS archive;
+CREATE TABLE IF NOT EXISTS archive.reactions (LIKE reactions);
@@ -0,0 +1,15 @@
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    id varchar(32) PRIMARY KEY,
+    kind text NOT NULL,
+    table_name text NOT NULL,
+    format text NOT NULL,
+    status text NOT NULL,
+    rows bigint NOT NULL DEFAULT 0,
+    inserted bigint NOT NULL DEFAULT 0,
+    updated bigint NOT NULL DEFAULT 0,
+    error text,
+    started_at timestamp without time zone NOT NULL,
+    finished_at timestamp without time zone
+);
+
+CREATE INDEX IF NOT EXISTS ix_bulk_jobs_started_at ON bulk_jobs (started_at);
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import DDL, select, func, cast, literal, table, column
+from sqlalchemy.dialects.postgresql import REGCLASS
+from sqlalchemy.ext.asyncio import AsyncSession
+
+RANGE_BOUNDS = re.compile(r"FROM \((-?\d+)\) TO \((-?\d+)\)")
+
+pg_inherits = table("pg_inherits", column("inhrelid"), column("inhparent"), schema="pg_catalog")
+pg_class = table("pg_class", column("oid"), column("relname"), column("relpartbound"), schema="pg_catalog")
+
+
+class Partition:
+    __slots__ = ("name", "lower", "upper")
+
+    def __init__(self, name: str, lower: int, upper: int):
+        self.name = name
+        self.lower = lower
+        self.upper = upper
+
+
+async def find_partitions(session: AsyncSession, parent: str) -> list[Partition]:
+    sql = (
+        select(pg_class.c.relname, func.pg_get_expr(pg_class.c.relpartbound, pg_class.c.oid))
+        .join(pg_inherits, pg_inherits.c.inhrelid == pg_class.c.oid)
+        .where(pg_inherits.c.inhparent == cast(literal(parent), REGCLASS))
+    )
+    res = await session.execute(sql)
+    partitions = []
+    for name, bounds in res.all():
+        match = RANGE_BOUNDS.search(bounds or "")
+        if match:
+            partitions.append(Partition(name, int(match.group(1)), int(match.group(2))))
+    return sorted(partitions, key=lambda partition: partition.lower)
+
+
+async def try_lock(session: AsyncSession, key: int) -> bool:
+    res = await session.execute(select(func.pg_try_advisory_xact_lock(key)))
+    return res.scalar_one()
+
+
+async def lock(session: AsyncSession, key: int):
+    await session.execute(select(func.pg_advisory_xact_lock(key)))
+
+
+async def create_range_partition(session: AsyncSession, parent: str, lower: int, upper: int) -> str:
+    name = f"{parent}_p{lower}"
+    await session.execute(DDL(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{parent}" FOR VALUES FROM ({lower}) TO ({upper})'))
+    return name
+
+
+async def archive_partition(session: AsyncSession, parent: str, name: str, schema: str = "archive"):
+    await session.execute(DDL(f'ALTER TABLE "{parent}" DETACH PARTITION "{name}"'))
+    await session.execute(DDL(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"'))
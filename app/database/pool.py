@@ -0,0 +1,52 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        stats = self.stats
+        stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.waiting -= 1
+            stats.checkouts += 1
+            stats.wait_total += elapsed
+            stats.wait_max = max(stats.wait_max, elapsed)
+
+    def snapshot(self) -> dict[str, int | float]:
+        stats = self.stats
+        checked_out = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        return {
+            "size": self.size(),
+            "idle": self.checkedin(),
+            "overflow": self.overflow(),
+            "checked_out": checked_out,
+            "waiting": stats.waiting,
+            "saturation": checked_out / capacity if capacity else 0.0,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_avg_ms": stats.wait_total / stats.checkouts * 1000 if stats.checkouts else 0.0,
+            "wait_max_ms": stats.wait_max * 1000,
+        }
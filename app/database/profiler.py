@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class Statement:
+    __slots__ = ("engine", "statement", "parameters", "duration", "executemany")
+
+    def __init__(self, engine: AsyncEngine, statement: str, parameters: Any, duration: float, executemany: bool):
+        self.engine = engine
+        self.statement = statement
+        self.parameters = parameters
+        self.duration = duration
+        self.executemany = executemany
+
+
+class RequestProfile:
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.statements: list[Statement] = []
+        self.slow: list[Statement] = []
+
+    @property
+    def db_time(self) -> float:
+        return sum(statement.duration for statement in self.statements)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        shapes = Counter(statement.statement for statement in self.statements)
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+def profile_engine(engine: AsyncEngine, slow_query: float):
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._profile_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        if profile is None:
+            return
+        record = Statement(engine, statement, parameters, time.perf_counter() - context._profile_start, executemany)
+        profile.statements.append(record)
+        if record.duration >= slow_query:
+            profile.slow.append(record)
+            logger.warning("slow query in %s (%.1f ms): %s parameters=%r", profile.name, record.duration * 1000, statement, parameters)
+
+
+def explainable(record: Statement) -> bool:
+    statement = record.statement.lstrip().upper()
+    return not record.executemany and statement.startswith("SELECT") and " FOR UPDATE" not in statement and " FOR SHARE" not in statement
+
+
+async def explain(record: Statement):
+    async with record.engine.connect() as conn:
+        res = await conn.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + record.statement, record.parameters)
+        plan = "\n".join(row[0] for row in res)
+        await conn.rollback()
+    logger.warning("plan for slow query (%.1f ms): %s\n%s", record.duration * 1000, record.statement, plan)
+
+
+async def explain_sampled(profile: RequestProfile, rate: float):
+    for record in profile.slow:
+        if explainable(record) and random.random() < rate:
+            try:
+                await explain(record)
+            except Exception:
+                logger.exception("failed to explain slow query: %s", record.statement)
+
+
+def report(profile: RequestProfile, n_plus_one: int):
+    for shape, count in profile.repeated(n_plus_one):
+        logger.warning("possible N+1 in %s: %d executions of %s", profile.name, count, shape)
+    logger.debug("%s issued %d statements in %.1f ms", profile.name, len(profile.statements), profile.db_time * 1000)
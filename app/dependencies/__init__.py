@@ -1,3 +1,5 @@
-from .auth import HTTPBearerScheme
-
-HTTPBearerScheme = HTTPBearerScheme()
+from .auth import HTTPBearerScheme
+from .. import config
+from ..pkg.cryptography import TokenCache
+
+HTTPBearerScheme = HTTPBearerScheme(cache=TokenCache(maxsize=config.TOKEN_CACHE_SIZE))
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Iterable
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import get_read_session
+from ..models.users import Users
+
+
+class UserLoader:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._futures: dict[int, asyncio.Future] = {}
+        self._queue: list[int] = []
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def load(self, user_id: int) -> asyncio.Future:
+        future = self._futures.get(user_id)
+        if future is None:
+            future = self._futures[user_id] = asyncio.get_running_loop().create_future()
+            self._queue.append(user_id)
+            if self._task is None:
+                self._task = asyncio.create_task(self._dispatch())
+        return future
+
+    async def load_many(self, ids: Iterable[int]) -> dict[int, dict]:
+        ids = list(dict.fromkeys(ids))
+        profiles = await asyncio.gather(*(self.load(user_id) for user_id in ids))
+        return {user_id: profile for user_id, profile in zip(ids, profiles) if profile is not None}
+
+    async def _dispatch(self):
+        ids, self._queue, self._task = self._queue, [], None
+        async with self._lock:
+            try:
+                profiles = await Users.get_profiles(self.session, ids=ids)
+            except Exception as e:
+                for user_id in ids:
+                    self._futures.pop(user_id).set_exception(e)
+                return
+        for user_id in ids:
+            self._futures[user_id].set_result(profiles.get(user_id))
+
+
+async def get_user_loader(session: AsyncSession = Depends(get_read_session)) -> UserLoader:
+    return UserLoader(session)
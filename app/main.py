@@ -1,44 +1,167 @@
-import sys
-
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.responses import UJSONResponse
-
-sys.path.append("/opt/Webtronics/")
-try:
-    from . import config, controllers
-    from .database.connection import init_models
-except:
-    from app import config, controllers
-    from app.database.connection import init_models
-
-
-async def http_exception(request: Request, exc: HTTPException):
-    return UJSONResponse(status_code=exc.status_code, content=exc.detail)
-
-
-exception_handlers = {HTTPException: http_exception}
-
-
-application = FastAPI(
-    title=config.TITLE,
-    description=config.DESCRIPTION,
-    version=config.VERSION,
-    docs_url="/docs",
-    redoc_url=None,
-    openapi_url="/openapi.json",
-    default_response_class=UJSONResponse,
-    exception_handlers=exception_handlers,
-)
-application.include_router(controllers.auth)
-application.include_router(controllers.posts)
-
-
-@application.on_event(event_type="startup")
-async def on_startup():
-    await init_models()
-
-
-@application.get("/docs", tags=["Other"])
-async def get_documentation():
-    return get_swagger_ui_html(openapi_url="/openapi.json", title="Documentation")
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import UJSONResponse
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config, controllers
+from .database.connection import engine, read_engine, async_session, async_read_session, pool_waiting, warm_up
+from .database.profiler import profile_engine
+from .dependencies import HTTPBearerScheme
+from .middlewares import AdmissionMiddleware, MetricsMiddleware, ProfilerMiddleware
+from .models.analytics import ReactionEvents, ReactionAnalytics
+from .models.posts import Posts
+from .models.sessions import Sessions
+from .pkg import ReactionCounter, ReactionIndex, HotPosts, Hashlibrary, RateLimiter, LiveHub
+from .pkg.metrics import registry
+from .pkg.tasks import PeriodicTask
+
+
+async def http_exception(request: Request, exc: HTTPException):
+    return UJSONResponse(status_code=exc.status_code, content=exc.detail)
+
+
+exception_handlers = {HTTPException: http_exception}
+
+
+async def reap_expired_sessions():
+    async with async_session() as session:
+        while await Sessions.delete_expired_sessions(session, batch_size=config.SESSIONS_REAPER_BATCH_SIZE) >= config.SESSIONS_REAPER_BATCH_SIZE:
+            pass
+
+
+sessions_reaper = PeriodicTask(interval=config.SESSIONS_REAPER_INTERVAL, func=reap_expired_sessions)
+
+
+async def flush_reactions(session: AsyncSession, deltas: dict[int, list[int]]):
+    await ReactionEvents.record(session, deltas)
+    return await Posts.increment_reactions(session, deltas)
+
+
+async def publish_reactions(totals: list[Row]):
+    await Posts.uncache([post.id for post in totals])
+    for post in totals:
+        LiveHub.publish(post.id, like_count=post.like_count, dislike_count=post.dislike_count)
+
+
+async def rollup_reaction_events():
+    async with async_session() as session:
+        while await ReactionAnalytics.rollup(session, batch_size=config.ANALYTICS_ROLLUP_BATCH_SIZE) >= config.ANALYTICS_ROLLUP_BATCH_SIZE:
+            pass
+        now = datetime.utcnow()
+        await ReactionAnalytics.prune(session, retention={
+            "minute": now - timedelta(seconds=config.ANALYTICS_MINUTE_RETENTION),
+            "hour": now - timedelta(seconds=config.ANALYTICS_HOUR_RETENTION),
+        })
+
+
+reactions_aggregator = PeriodicTask(interval=config.ANALYTICS_ROLLUP_INTERVAL, func=rollup_reaction_events)
+
+
+async def ensure_post_partitions():
+    async with async_session() as session:
+        await Posts.ensure_partitions(session, size=config.POSTS_PARTITION_SIZE, ahead=config.POSTS_PARTITIONS_AHEAD)
+
+
+async def maintain_post_partitions():
+    await ensure_post_partitions()
+    if config.POSTS_ARCHIVE_AFTER:
+        async with async_session() as session:
+            await Posts.archive_partitions(session, before=datetime.utcnow() - timedelta(seconds=config.POSTS_ARCHIVE_AFTER))
+
+
+posts_partitioner = PeriodicTask(interval=config.POSTS_PARTITION_INTERVAL, func=maintain_post_partitions)
+
+
+async def dump_metrics():
+    registry.dump()
+
+
+metrics_writer = PeriodicTask(interval=config.METRICS_SYNC_INTERVAL, func=dump_metrics)
+
+
+application = FastAPI(
+    title=config.TITLE,
+    description=config.DESCRIPTION,
+    version=config.VERSION,
+    docs_url="/docs",
+    redoc_url=None,
+    openapi_url="/openapi.json",
+    default_response_class=UJSONResponse,
+    exception_handlers=exception_handlers,
+)
+application.state.ready = False
+application.include_router(controllers.auth)
+application.include_router(controllers.jwks)
+application.include_router(controllers.posts)
+application.include_router(controllers.users)
+application.include_router(controllers.analytics)
+application.include_router(controllers.admin)
+application.include_router(controllers.stats)
+application.include_router(controllers.metrics)
+application.include_router(controllers.health)
+application.add_middleware(
+    AdmissionMiddleware,
+    limiter=RateLimiter if config.RATE_LIMIT_ENABLED else None,
+    authenticate=HTTPBearerScheme,
+    pool_waiting=pool_waiting,
+    max_inflight=config.ADMISSION_MAX_INFLIGHT,
+    max_pool_waiting=config.ADMISSION_MAX_POOL_WAITING,
+    exempt_paths=config.ADMISSION_EXEMPT_PATHS,
+    inflight_exempt_paths=config.ADMISSION_INFLIGHT_EXEMPT_PATHS,
+)
+application.add_middleware(MetricsMiddleware)
+
+if config.PROFILER_ENABLED:
+    for profiled_engine in {engine, read_engine}:
+        profile_engine(profiled_engine, slow_query=config.PROFILER_SLOW_QUERY_MS / 1000)
+    application.add_middleware(
+        ProfilerMiddleware,
+        n_plus_one=config.PROFILER_N_PLUS_ONE,
+        explain_rate=config.PROFILER_EXPLAIN_RATE,
+        server_timing=config.PROFILER_SERVER_TIMING,
+    )
+
+
+@application.on_event(event_type="startup")
+async def on_startup():
+    if config.METRICS_DIR:
+        registry.share(config.METRICS_DIR)
+    ReactionCounter.start(session_factory=async_session, flush=flush_reactions, committed=publish_reactions)
+    LiveHub.start()
+    ReactionIndex.start()
+
+    await warm_up(connections=config.SERVER_WARMUP_CONNECTIONS)
+    await ensure_post_partitions()
+
+    async with async_read_session() as session:
+        since = datetime.utcnow() - timedelta(seconds=config.HOT_POSTS_WINDOW)
+        HotPosts.rebuild(await Posts.find_hot_posts(session, limit=HotPosts.capacity, since=since, decay=HotPosts.decay))
+        await Posts.get_posts_by_ids(session, ids=HotPosts.page(0, config.SERVER_WARMUP_POSTS))
+
+    sessions_reaper.start()
+    reactions_aggregator.start()
+    posts_partitioner.start()
+    metrics_writer.start()
+    application.state.ready = True
+
+
+@application.on_event(event_type="shutdown")
+async def on_shutdown():
+    application.state.ready = False
+    await sessions_reaper.stop()
+    await reactions_aggregator.stop()
+    await posts_partitioner.stop()
+    await ReactionCounter.stop()
+    await LiveHub.stop()
+    await ReactionIndex.stop()
+    Hashlibrary.shutdown()
+    await metrics_writer.stop()
+    registry.dump()
+
+
+@application.get("/docs", tags=["Other"])
+async def get_documentation():
+    return get_swagger_ui_html(openapi_url="/openapi.json", title="Documentation")
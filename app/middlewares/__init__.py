@@ -0,0 +1,3 @@
+from .admission import AdmissionMiddleware
+from .metrics import MetricsMiddleware
+from .profiler import ProfilerMiddleware
@@ -0,0 +1,85 @@
+from typing import Callable
+
+import ujson
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..pkg.ratelimit import RateLimiter
+from ..responses import HTTPError
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        limiter: RateLimiter | None = None,
+        authenticate: Callable | None = None,
+        pool_waiting: Callable[[], int] | None = None,
+        max_inflight: int = 0,
+        max_pool_waiting: int = 0,
+        exempt_paths: list[str] | None = None,
+        inflight_exempt_paths: list[str] | None = None,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.authenticate = authenticate
+        self.pool_waiting = pool_waiting
+        self.max_inflight = max_inflight
+        self.max_pool_waiting = max_pool_waiting
+        self.exempt_paths = set(exempt_paths or [])
+        self.inflight_exempt_paths = set(inflight_exempt_paths or [])
+        self.inflight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            return await self.app(scope, receive, send)
+
+        counted = scope["path"] not in self.inflight_exempt_paths
+        if counted and self.max_inflight and self.inflight >= self.max_inflight:
+            return await self.reject(send, 503, "service is overloaded, try again later", 1)
+        if self.max_pool_waiting and self.pool_waiting is not None and self.pool_waiting() >= self.max_pool_waiting:
+            return await self.reject(send, 503, "service is overloaded, try again later", 1)
+
+        if self.limiter is not None:
+            policy = self.limiter.policy(scope["method"], scope["path"])
+            if policy is not None:
+                allowed, retry_after = await self.limiter.hit(policy, await self.principal(scope))
+                if not allowed:
+                    return await self.reject(send, 429, "too many requests", retry_after)
+
+        if not counted:
+            return await self.app(scope, receive, send)
+
+        self.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
+
+    async def principal(self, scope: Scope) -> str:
+        if self.authenticate is not None and "authorization" in Headers(scope=scope):
+            try:
+                payload = await self.authenticate(Request(scope))
+            except HTTPError:
+                pass
+            else:
+                return f"user:{payload.user_id}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    async def reject(send: Send, status: int, message: str, retry_after: int):
+        body = ujson.dumps({"message": message}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
@@ -0,0 +1,42 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..pkg.metrics import QueryStats, request_queries, http_requests, http_request_duration, http_request_queries, http_request_db_duration
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: dict | None = None
+
+    def route(self, scope: Scope) -> str:
+        if self._routes is None:
+            self._routes = {route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")}
+        return self._routes.get(scope.get("endpoint"), "<unmatched>")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = request_queries.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_queries.reset(token)
+            method, route = scope["method"], self.route(scope)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(elapsed, method, route)
+            http_request_queries.observe(stats.count, method, route)
+            http_request_db_duration.observe(stats.duration, method, route)
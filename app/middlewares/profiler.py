@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..database.profiler import RequestProfile, current_profile, report, explain_sampled
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: ASGIApp, *, n_plus_one: int = 3, explain_rate: float = 0.0, server_timing: bool = False):
+        self.app = app
+        self.n_plus_one = n_plus_one
+        self.explain_rate = explain_rate
+        self.server_timing = server_timing
+        self._explains: set[asyncio.Task] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(f"{scope['method']} {scope['path']}")
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                total = time.perf_counter() - profile.start
+                db = profile.db_time
+                timing = f'db;dur={db * 1000:.2f};desc="{len(profile.statements)} queries", app;dur={(total - db) * 1000:.2f}, total;dur={total * 1000:.2f}'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            report(profile, self.n_plus_one)
+            if profile.slow and self.explain_rate > 0:
+                task = asyncio.create_task(explain_sampled(profile, self.explain_rate))
+                self._explains.add(task)
+                task.add_done_callback(self._explains.discard)
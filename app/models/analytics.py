@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, Index, CheckConstraint, select, delete, bindparam, func, values, column, true
+from sqlalchemy import Integer, BigInteger, DateTime, Text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import Base
+from .posts import Posts
+
+GRANULARITIES = ("minute", "hour", "day")
+
+
+class ReactionEvents(Base):
+    __tablename__ = "reaction_events"
+
+    id = Column(BigInteger, autoincrement=True, primary_key=True)
+
+    post_id = Column(Integer, nullable=False)
+    author_id = Column(Integer, nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    likes = Column(Integer, nullable=False)
+    dislikes = Column(Integer, nullable=False)
+
+    @staticmethod
+    async def record(session: AsyncSession, deltas: dict[int, list[int]]):
+        posts = Posts.__table__
+        sql = ReactionEvents.__table__.insert().from_select(
+            ["post_id", "author_id", "occurred_at", "likes", "dislikes"],
+            select(posts.c.id, posts.c.user_id, bindparam("occurred_at", type_=DateTime), bindparam("likes", type_=Integer), bindparam("dislikes", type_=Integer)).where(posts.c.id == bindparam("post_id")),
+        )
+        occurred_at = datetime.utcnow()
+        params = [
+            {"post_id": post_id, "occurred_at": occurred_at, "likes": likes, "dislikes": dislikes}
+            for post_id, (likes, dislikes) in sorted(deltas.items())
+            if likes or dislikes
+        ]
+        if params:
+            await session.execute(sql, params)
+
+
+class PostReactionRollups(Base):
+    __tablename__ = "post_reaction_rollups"
+
+    post_id = Column(Integer, primary_key=True)
+    granularity = Column(Text, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    likes = Column(Integer, nullable=False, default=0)
+    dislikes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint("granularity IN ('minute', 'hour', 'day')", name="post_reaction_rollups_granularity_check"),
+        Index("ix_post_reaction_rollups_granularity_bucket", granularity, bucket),
+    )
+
+
+class AuthorReactionRollups(Base):
+    __tablename__ = "author_reaction_rollups"
+
+    author_id = Column(Integer, primary_key=True)
+    granularity = Column(Text, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    likes = Column(Integer, nullable=False, default=0)
+    dislikes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint("granularity IN ('minute', 'hour', 'day')", name="author_reaction_rollups_granularity_check"),
+        Index("ix_author_reaction_rollups_granularity_bucket", granularity, bucket),
+    )
+
+
+class ReactionAnalytics:
+    @staticmethod
+    def _upsert(rollups, key: str, moved, grains):
+        table = rollups.__table__
+        bucket = func.date_trunc(grains.c.granularity, moved.c.occurred_at)
+        rows = (
+            select(moved.c[key], grains.c.granularity, bucket, func.sum(moved.c.likes), func.sum(moved.c.dislikes))
+            .select_from(moved.join(grains, true()))
+            .group_by(moved.c[key], grains.c.granularity, bucket)
+            .order_by(moved.c[key], grains.c.granularity, bucket)
+        )
+        sql = insert(table).from_select([key, "granularity", "bucket", "likes", "dislikes"], rows)
+        return sql.on_conflict_do_update(
+            index_elements=[table.c[key], table.c.granularity, table.c.bucket],
+            set_={"likes": table.c.likes + sql.excluded.likes, "dislikes": table.c.dislikes + sql.excluded.dislikes},
+        ).returning(table.c[key])
+
+    @staticmethod
+    async def rollup(session: AsyncSession, batch_size: int) -> int:
+        events = ReactionEvents.__table__
+        batch = select(events.c.id).order_by(events.c.id).limit(batch_size).with_for_update(skip_locked=True)
+        moved = (
+            delete(events)
+            .where(events.c.id.in_(batch))
+            .returning(events.c.post_id, events.c.author_id, events.c.occurred_at, events.c.likes, events.c.dislikes)
+            .cte("moved")
+        )
+        grains = values(column("granularity", Text), name="grains").data([(granularity,) for granularity in GRANULARITIES])
+        posts = ReactionAnalytics._upsert(PostReactionRollups, "post_id", moved, grains).cte("post_rollups")
+        authors = ReactionAnalytics._upsert(AuthorReactionRollups, "author_id", moved, grains).cte("author_rollups")
+        sql = select(
+            select(func.count()).select_from(moved).scalar_subquery(),
+            select(func.count()).select_from(posts).scalar_subquery(),
+            select(func.count()).select_from(authors).scalar_subquery(),
+        )
+        res = await session.execute(sql)
+        await session.commit()
+        return res.first()[0]
+
+    @staticmethod
+    async def prune(session: AsyncSession, retention: dict[str, datetime]) -> int:
+        deleted = 0
+        for rollups in (PostReactionRollups, AuthorReactionRollups):
+            table = rollups.__table__
+            for granularity, before in retention.items():
+                res = await session.execute(delete(table).where(table.c.granularity == granularity, table.c.bucket < before))
+                deleted += res.rowcount
+        await session.commit()
+        return deleted
+
+    @staticmethod
+    async def find_post_series(session: AsyncSession, post_id: int, granularity: str, since: datetime, until: datetime) -> list[Row]:
+        table = PostReactionRollups.__table__
+        sql = (
+            select(table.c.bucket, table.c.likes, table.c.dislikes)
+            .where(table.c.post_id == post_id, table.c.granularity == granularity, table.c.bucket >= since, table.c.bucket < until)
+            .order_by(table.c.bucket)
+        )
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def find_author_series(session: AsyncSession, author_id: int, granularity: str, since: datetime, until: datetime) -> list[Row]:
+        table = AuthorReactionRollups.__table__
+        sql = (
+            select(table.c.bucket, table.c.likes, table.c.dislikes)
+            .where(table.c.author_id == author_id, table.c.granularity == granularity, table.c.bucket >= since, table.c.bucket < until)
+            .order_by(table.c.bucket)
+        )
+        res = await session.execute(sql)
+        return res.all()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Index, select, delete
+from sqlalchemy import BigInteger, VARCHAR, DateTime, Text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import Base
+from ..pkg.jobs import Job
+
+
+class BulkJobs(Base):
+    __tablename__ = "bulk_jobs"
+
+    id = Column(VARCHAR(length=32), primary_key=True)
+
+    kind = Column(Text, nullable=False)
+    table_name = Column(Text, nullable=False)
+    format = Column(Text, nullable=False)
+    status = Column(Text, nullable=False)
+    rows = Column(BigInteger, nullable=False, default=0)
+    inserted = Column(BigInteger, nullable=False, default=0)
+    updated = Column(BigInteger, nullable=False, default=0)
+    error = Column(Text)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_bulk_jobs_started_at", started_at),
+    )
+
+    @staticmethod
+    def _columns():
+        table = BulkJobs.__table__
+        return [column.label("table") if column is table.c.table_name else column for column in table.c]
+
+    @staticmethod
+    async def save_job(session: AsyncSession, job: Job):
+        table = BulkJobs.__table__
+        values = {
+            "id": job.id,
+            "kind": job.kind,
+            "table_name": job.table,
+            "format": job.format,
+            "status": job.status,
+            "rows": job.rows,
+            "inserted": job.inserted,
+            "updated": job.updated,
+            "error": job.error,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+        sql = insert(table).values(values)
+        sql = sql.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={name: sql.excluded[name] for name in ("status", "rows", "inserted", "updated", "error", "finished_at")},
+        )
+        await session.execute(sql)
+        await session.commit()
+
+    @staticmethod
+    async def find_job(session: AsyncSession, job_id: str) -> Job | None:
+        res = await session.execute(select(*BulkJobs._columns()).where(BulkJobs.__table__.c.id == job_id))
+        row = res.first()
+        return None if row is None else Job(**row._mapping)
+
+    @staticmethod
+    async def find_jobs(session: AsyncSession, limit: int) -> list[Job]:
+        table = BulkJobs.__table__
+        res = await session.execute(select(*BulkJobs._columns()).order_by(table.c.started_at.desc()).limit(limit))
+        return [Job(**row._mapping) for row in res.all()]
+
+    @staticmethod
+    async def prune_jobs(session: AsyncSession, keep: int) -> int:
+        table = BulkJobs.__table__
+        stale = select(table.c.id).where(table.c.status != "running").order_by(table.c.started_at.desc()).offset(keep)
+        res = await session.execute(delete(table).where(table.c.id.in_(stale)))
+        await session.commit()
+        return res.rowcount
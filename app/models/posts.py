@@ -1,60 +1,376 @@
-from __future__ import annotations
-
-from datetime import datetime
-
-from sqlalchemy import Column, select
-from sqlalchemy import Integer, DateTime, Text
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from ..database.connection import Base
-
-
-class Posts(Base):
-    __tablename__ = "posts"
-
-    id = Column(Integer, autoincrement=True, primary_key=True, index=True)
-
-    user_id = Column(Integer, unique=False, index=True)
-    title = Column(Text, unique=True, index=True)
-    description = Column(Text, index=True)
-    like_count = Column(Integer, index=True, default=0)
-    dislike_count = Column(Integer, index=True, default=0)
-
-    created_at = Column(DateTime, index=True, default=datetime.utcnow)
-
-    @staticmethod
-    async def create_post(session: AsyncSession, user_id: int, title: str, description: str) -> Posts:
-        post = Posts(user_id=user_id, title=title, description=description)
-        session.add(post)
-        await session.commit()
-        return post
-
-    @staticmethod
-    async def find_post(session: AsyncSession, post_id: int) -> Posts | None:
-        sql = select(Posts).where(Posts.id == post_id)
-        res = await session.execute(sql)
-        return res.scalars().first()
-
-    @staticmethod
-    async def find_posts(session: AsyncSession, user_id: int) -> list[Posts]:
-        sql = select(Posts).filter(Posts.user_id == user_id)
-        res = await session.execute(sql)
-        return res.scalars().all()
-
-    @staticmethod
-    async def update_post(session: AsyncSession, post: Posts, title: str = None, description: str = None, like_count: int = None, dislike_count: int = None) -> Posts:
-        if title:
-            post.title = title
-        if description:
-            post.description = description
-        if like_count:
-            post.like_count = like_count
-        if dislike_count:
-            post.dislike_count = dislike_count
-        await session.commit()
-        return post
-
-    @staticmethod
-    async def delete_post(session: AsyncSession, post: Posts):
-        await session.delete(post)
-        await session.commit()
+from __future__ import annotations
+
+from datetime import datetime
+
+from typing import AsyncIterator
+
+from sqlalchemy import Column, Index, Table, MetaData, select, update, delete, bindparam, tuple_, func, any_, literal, column, table
+from sqlalchemy import Integer, DateTime, Text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import POSTS_CACHE_REPLICA_TTL
+from ..database.connection import Base, engine
+from ..database.copy import copy_to_staging
+from ..database.partitions import find_partitions, lock, try_lock, create_range_partition, archive_partition
+from ..pkg import PostsCache
+from .reactions import Reactions
+
+search_vector = column("search_vector", TSVECTOR)
+SEARCH_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=24, MinWords=8"
+PARTITIONS_LOCK_ID = 7_318_420_216
+
+HTML_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;"))
+
+posts_id_seq = table("posts_id_seq", column("last_value"))
+
+import_staging = Table(
+    "posts_import",
+    MetaData(),
+    Column("ord", Integer),
+    Column("user_id", Integer),
+    Column("title", Text),
+    Column("description", Text),
+    Column("like_count", Integer),
+    Column("dislike_count", Integer),
+    Column("created_at", DateTime),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+class PostTitles(Base):
+    __tablename__ = "post_titles"
+
+    title = Column(Text, primary_key=True)
+    post_id = Column(Integer, nullable=False, index=True)
+
+
+class Posts(Base):
+    __tablename__ = "posts"
+
+    id = Column(Integer, autoincrement=True, primary_key=True)
+
+    user_id = Column(Integer, unique=False)
+    title = Column(Text)
+    description = Column(Text)
+    like_count = Column(Integer, default=0)
+    dislike_count = Column(Integer, default=0)
+
+    version = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, index=True, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_posts_user_id_created_at_id", user_id, created_at.desc(), id.desc()),
+        {"postgresql_partition_by": "RANGE (id)"},
+    )
+
+    partitions_upper = 0
+
+    @staticmethod
+    async def create_post(session: AsyncSession, user_id: int, title: str, description: str) -> Posts:
+        post = Posts(user_id=user_id, title=title, description=description)
+        session.add(post)
+        await session.commit()
+        return post
+
+    @staticmethod
+    async def create_posts(session: AsyncSession, user_id: int, posts: list[dict]) -> list[Row]:
+        if not posts:
+            return []
+        table = Posts.__table__
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "title": post["title"],
+                "description": post["description"],
+                "like_count": 0,
+                "dislike_count": 0,
+                "version": 1,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            for post in posts
+        ]
+        await Posts._skip_duplicate_titles(session)
+        res = await session.execute(insert(table).values(rows).returning(*table.c))
+        await session.commit()
+        return res.all()
+
+    @staticmethod
+    async def find_post(session: AsyncSession, post_id: int) -> Posts | None:
+        sql = select(Posts).where(Posts.id == post_id)
+        res = await session.execute(sql)
+        return res.scalars().first()
+
+    @staticmethod
+    def _cache_key(post_id: int) -> str:
+        return f"post:{post_id}"
+
+    @staticmethod
+    def _cache_row(post: Posts) -> dict:
+        return {column.name: getattr(post, column.name) for column in Posts.__table__.columns}
+
+    @staticmethod
+    async def uncache(ids: list[int]):
+        await PostsCache.delete(*(Posts._cache_key(post_id) for post_id in ids))
+
+    @staticmethod
+    def _cache_ttl(session: AsyncSession) -> float | None:
+        return None if session.bind is engine else POSTS_CACHE_REPLICA_TTL
+
+    @staticmethod
+    async def get_post(session: AsyncSession, post_id: int) -> Posts | None:
+        row = await PostsCache.get(Posts._cache_key(post_id))
+        if row is not None:
+            return Posts(**row)
+
+        post = await Posts.find_post(session, post_id=post_id)
+        if post is not None:
+            await PostsCache.set(Posts._cache_key(post_id), Posts._cache_row(post), ttl=Posts._cache_ttl(session))
+        return post
+
+    @staticmethod
+    async def get_post_version(session: AsyncSession, post_id: int) -> Posts | Row | None:
+        row = await PostsCache.get(Posts._cache_key(post_id))
+        if row is not None:
+            return Posts(**row)
+
+        sql = select(Posts.id, Posts.user_id, Posts.version, Posts.updated_at).where(Posts.id == post_id)
+        res = await session.execute(sql)
+        return res.first()
+
+    @staticmethod
+    async def get_posts_by_ids(session: AsyncSession, ids: list[int]) -> list[Posts]:
+        cached = await PostsCache.get_many([Posts._cache_key(post_id) for post_id in ids])
+        posts, missing = [], []
+        for post_id in ids:
+            row = cached.get(Posts._cache_key(post_id))
+            if row is not None:
+                posts.append(Posts(**row))
+            else:
+                missing.append(post_id)
+
+        ttl = Posts._cache_ttl(session)
+        for post in await Posts.find_posts_by_ids(session, ids=missing):
+            await PostsCache.set(Posts._cache_key(post.id), Posts._cache_row(post), ttl=ttl)
+            posts.append(post)
+        return posts
+
+    @staticmethod
+    def _user_posts_query(user_id: int, after: tuple[datetime, int] | None = None):
+        sql = select(*Posts.__table__.columns).filter(Posts.user_id == user_id)
+        if after:
+            sql = sql.filter(tuple_(Posts.created_at, Posts.id) < tuple_(*after))
+        return sql.order_by(Posts.created_at.desc(), Posts.id.desc())
+
+    @staticmethod
+    async def find_posts(session: AsyncSession, user_id: int, limit: int | None = None, after: tuple[datetime, int] | None = None) -> list[Row]:
+        sql = Posts._user_posts_query(user_id, after=after).limit(limit)
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def find_posts_versions(session: AsyncSession, user_id: int, limit: int | None = None, after: tuple[datetime, int] | None = None) -> list[Row]:
+        sql = Posts._user_posts_query(user_id, after=after).with_only_columns(Posts.id, Posts.user_id, Posts.version, Posts.updated_at).limit(limit)
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def stream_posts(session: AsyncSession, user_id: int, after: tuple[datetime, int] | None = None, chunk_size: int = 500) -> AsyncIterator[Row]:
+        sql = Posts._user_posts_query(user_id, after=after).execution_options(yield_per=chunk_size)
+        return await session.stream(sql)
+
+    @staticmethod
+    async def stream_export(session: AsyncSession, chunk_size: int = 1000) -> AsyncIterator[Row]:
+        table = Posts.__table__
+        sql = (
+            select(table.c.id, table.c.user_id, table.c.title, table.c.description, table.c.like_count, table.c.dislike_count, table.c.created_at, table.c.updated_at)
+            .order_by(table.c.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        return await session.stream(sql)
+
+    @staticmethod
+    async def import_posts(session: AsyncSession, records: list[tuple], update: bool = False) -> tuple[int, int]:
+        table, titles, staging = Posts.__table__, PostTitles.__table__, import_staging
+        await copy_to_staging(session, staging, records)
+        latest = select(staging).distinct(staging.c.title).order_by(staging.c.title, staging.c.ord.desc()).subquery()
+
+        updated = []
+        if update:
+            sql = (
+                table.update()
+                .where(table.c.id == titles.c.post_id, titles.c.title == latest.c.title)
+                .values(
+                    user_id=latest.c.user_id,
+                    description=latest.c.description,
+                    like_count=latest.c.like_count,
+                    dislike_count=latest.c.dislike_count,
+                    version=table.c.version + 1,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(table.c.id)
+            )
+            res = await session.execute(sql)
+            updated = res.scalars().all()
+
+        await Posts._skip_duplicate_titles(session)
+        rows = select(latest.c.user_id, latest.c.title, latest.c.description, latest.c.like_count, latest.c.dislike_count, literal(1, Integer), latest.c.created_at, latest.c.created_at)
+        sql = insert(table).from_select(["user_id", "title", "description", "like_count", "dislike_count", "version", "created_at", "updated_at"], rows)
+        res = await session.execute(sql.returning(table.c.id))
+        inserted = len(res.all())
+        await session.commit()
+        if updated:
+            await PostsCache.delete(*(Posts._cache_key(post_id) for post_id in updated))
+        return inserted, len(updated)
+
+    @staticmethod
+    async def _skip_duplicate_titles(session: AsyncSession):
+        await session.execute(select(func.set_config("app.duplicate_titles", "skip", True)))
+
+    @staticmethod
+    async def ensure_partitions(session: AsyncSession, size: int, ahead: int, wait: bool = False) -> list[str]:
+        created = []
+        if wait:
+            await lock(session, PARTITIONS_LOCK_ID)
+        if wait or await try_lock(session, PARTITIONS_LOCK_ID):
+            partitions = await find_partitions(session, Posts.__tablename__)
+            if partitions:
+                last_id = await Posts._last_id(session)
+                upper = partitions[-1].upper
+                while upper <= last_id + size * ahead:
+                    created.append(await create_range_partition(session, Posts.__tablename__, upper, upper + size))
+                    upper += size
+                Posts.partitions_upper = upper
+        await session.commit()
+        return created
+
+    @staticmethod
+    async def ensure_headroom(session: AsyncSession, size: int, ahead: int, last_id: int | None = None) -> list[str]:
+        if last_id is None:
+            last_id = await Posts._last_id(session)
+        if last_id + size * ahead < Posts.partitions_upper:
+            return []
+        return await Posts.ensure_partitions(session, size=size, ahead=ahead, wait=True)
+
+    @staticmethod
+    async def _last_id(session: AsyncSession) -> int:
+        res = await session.execute(select(posts_id_seq.c.last_value))
+        return res.scalar_one()
+
+    @staticmethod
+    async def archive_partitions(session: AsyncSession, before: datetime) -> list[str]:
+        archived = []
+        partitions = await find_partitions(session, Posts.__tablename__)
+        last_id = await Posts._last_id(session)
+        await session.commit()
+
+        titles = PostTitles.__table__
+        for partition in partitions:
+            if partition.upper > last_id or not await try_lock(session, PARTITIONS_LOCK_ID):
+                break
+            res = await session.execute(select(func.max(Posts.created_at)).where(Posts.id >= partition.lower, Posts.id < partition.upper))
+            newest = res.scalar()
+            if newest is not None and newest >= before:
+                break
+            await Reactions.archive_posts(session, lower=partition.lower, upper=partition.upper)
+            await session.execute(delete(titles).where(titles.c.post_id >= partition.lower, titles.c.post_id < partition.upper))
+            await archive_partition(session, Posts.__tablename__, partition.name)
+            await session.commit()
+            archived.append(partition.name)
+        await session.rollback()
+        return archived
+
+    @staticmethod
+    async def find_posts_by_ids(session: AsyncSession, ids: list[int]) -> list[Posts]:
+        if not ids:
+            return []
+        sql = select(Posts).where(Posts.id == any_(literal(ids, ARRAY(Integer))))
+        res = await session.execute(sql)
+        return res.scalars().all()
+
+    @staticmethod
+    def _html_escape(text):
+        for char, entity in HTML_ESCAPES:
+            text = func.replace(text, char, entity)
+        return text
+
+    @staticmethod
+    async def search_posts(session: AsyncSession, query: str, limit: int, after: tuple[float, int] | None = None) -> list[Row]:
+        tsquery = func.websearch_to_tsquery("english", query)
+        rank = func.ts_rank_cd(search_vector, tsquery)
+
+        matches = select(Posts.id, rank.label("rank")).where(search_vector.op("@@")(tsquery))
+        if after:
+            matches = matches.where(tuple_(rank, Posts.id) < tuple_(*after))
+        matches = matches.order_by(rank.desc(), Posts.id.desc()).limit(limit).subquery()
+
+        headline = func.ts_headline("english", Posts._html_escape(Posts.description), tsquery, SEARCH_HEADLINE_OPTIONS)
+        sql = (
+            select(*Posts.__table__.columns, matches.c.rank, headline.label("snippet"))
+            .join(matches, Posts.id == matches.c.id)
+            .order_by(matches.c.rank.desc(), Posts.id.desc())
+        )
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def find_hot_posts(session: AsyncSession, limit: int, since: datetime, decay: float):
+        score = Posts.like_count - Posts.dislike_count
+        hot_score = func.sign(score) * func.log(func.greatest(func.abs(score), 1)) + func.extract("epoch", Posts.created_at) / decay
+        sql = (
+            select(Posts.id, Posts.like_count, Posts.dislike_count, Posts.created_at)
+            .where(Posts.created_at >= since)
+            .order_by(hot_score.desc())
+            .limit(limit)
+        )
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def update_post(session: AsyncSession, post: Posts, title: str = None, description: str = None, like_count: int = None, dislike_count: int = None) -> Row:
+        table = Posts.__table__
+        values = {"version": table.c.version + 1, "updated_at": datetime.utcnow()}
+        if title:
+            values["title"] = title
+        if description:
+            values["description"] = description
+        if like_count:
+            values["like_count"] = like_count
+        if dislike_count:
+            values["dislike_count"] = dislike_count
+        sql = update(table).where(table.c.id == post.id).values(**values).returning(*table.c)
+        res = await session.execute(sql)
+        await session.commit()
+        await PostsCache.delete(Posts._cache_key(post.id))
+        return res.one()
+
+    @staticmethod
+    async def increment_reactions(session: AsyncSession, deltas: dict[int, list[int]]) -> list[Row]:
+        table = Posts.__table__
+        sql = (
+            update(table)
+            .where(table.c.id == bindparam("post_id"))
+            .values(
+                like_count=table.c.like_count + bindparam("likes"),
+                dislike_count=table.c.dislike_count + bindparam("dislikes"),
+                version=table.c.version + 1,
+                updated_at=datetime.utcnow(),
+            )
+        )
+        params = [{"post_id": post_id, "likes": likes, "dislikes": dislikes} for post_id, (likes, dislikes) in sorted(deltas.items())]
+        await session.execute(sql, params)
+        res = await session.execute(select(table.c.id, table.c.like_count, table.c.dislike_count).where(table.c.id == any_(literal(list(deltas), ARRAY(Integer)))))
+        totals = res.all()
+        await session.commit()
+        return totals
+
+    @staticmethod
+    async def delete_post(session: AsyncSession, post: Posts):
+        await session.delete(post)
+        await session.commit()
+        await PostsCache.delete(Posts._cache_key(post.id))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, ForeignKey, Index, CheckConstraint, Table, MetaData, select, delete, literal_column
+from sqlalchemy import Integer, SmallInteger, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import Base
+from ..pkg import ReactionIndex
+from ..pkg.reactions import UserReactions
+
+LIKE = 1
+DISLIKE = -1
+
+archived_reactions = Table(
+    "reactions",
+    MetaData(),
+    Column("user_id", Integer),
+    Column("post_id", Integer),
+    Column("value", SmallInteger),
+    Column("created_at", DateTime),
+    schema="archive",
+)
+
+
+class Reactions(Base):
+    __tablename__ = "reactions"
+
+    user_id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    value = Column(SmallInteger, nullable=False)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        CheckConstraint("value IN (-1, 1)", name="reactions_value_check"),
+        Index("ix_reactions_post_id", post_id),
+    )
+
+    @staticmethod
+    async def react(session: AsyncSession, user_id: int, post_id: int, value: int) -> tuple[int, int] | None:
+        table = Reactions.__table__
+        sql = insert(table).values(user_id=user_id, post_id=post_id, value=value, created_at=datetime.utcnow())
+        sql = sql.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.post_id],
+            set_={"value": sql.excluded.value, "created_at": sql.excluded.created_at},
+            where=table.c.value != sql.excluded.value,
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        res = await session.execute(sql)
+        await session.commit()
+        row = res.first()
+        if row is None:
+            return None
+        ReactionIndex.set(user_id, post_id, value)
+        return (0 if row.inserted else -value), value
+
+    @staticmethod
+    async def unreact(session: AsyncSession, user_id: int, post_id: int) -> int | None:
+        table = Reactions.__table__
+        sql = delete(table).where(table.c.user_id == user_id, table.c.post_id == post_id).returning(table.c.value)
+        res = await session.execute(sql)
+        await session.commit()
+        ReactionIndex.set(user_id, post_id, 0)
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def find_user_reactions(session: AsyncSession, user_id: int) -> list[Row]:
+        sql = select(Reactions.post_id, Reactions.value).where(Reactions.user_id == user_id)
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def get_user_reactions(session: AsyncSession, user_id: int) -> UserReactions:
+        reactions = ReactionIndex.get(user_id)
+        if reactions is not None:
+            return reactions
+
+        ReactionIndex.begin(user_id)
+        try:
+            rows = await Reactions.find_user_reactions(session, user_id=user_id)
+        except BaseException:
+            ReactionIndex.cancel(user_id)
+            raise
+        return ReactionIndex.warm(user_id, rows)
+
+    @staticmethod
+    async def archive_posts(session: AsyncSession, lower: int, upper: int) -> int:
+        table = Reactions.__table__
+        moved = delete(table).where(table.c.post_id >= lower, table.c.post_id < upper).returning(*table.c).cte("moved")
+        sql = archived_reactions.insert().from_select([column.name for column in table.c], select(moved))
+        res = await session.execute(sql)
+        return res.rowcount
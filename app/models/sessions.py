@@ -1,53 +1,73 @@
-from __future__ import annotations
-
-from datetime import datetime
-
-from sqlalchemy import Column, select
-from sqlalchemy import Integer, VARCHAR, DateTime
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from ..database.connection import Base
-
-
-class Sessions(Base):
-    __tablename__ = "sessions"
-
-    id = Column(Integer, autoincrement=True, primary_key=True, index=True)
-
-    user_id = Column(Integer, unique=True, index=True)
-    token = Column(VARCHAR(length=512), unique=True, index=True)
-
-    created_at = Column(DateTime, index=True, default=datetime.utcnow)
-
-    @staticmethod
-    async def create_session(session: AsyncSession, user_id: int, token: str) -> Sessions:
-        sessions = Sessions(user_id=user_id, token=token)
-        session.add(sessions)
-        await session.commit()
-        return sessions
-
-    @staticmethod
-    async def find_session_by_user_id(session: AsyncSession, user_id: int) -> Sessions:
-        sql = select(Sessions).where(Sessions.user_id == user_id)
-        res = await session.execute(sql)
-        return res.scalars().first()
-
-    @staticmethod
-    async def find_session(session: AsyncSession, token: str) -> Sessions:
-        sql = select(Sessions).where(Sessions.token == token)
-        res = await session.execute(sql)
-        return res.scalars().first()
-
-    @staticmethod
-    async def update_session(session: AsyncSession, current_session: Sessions, user_id: int = None, token: str = None) -> Sessions:
-        if user_id:
-            current_session.user_id = user_id
-        if token:
-            current_session.token = token
-        await session.commit()
-        return current_session
-
-    @staticmethod
-    async def delete_session(session: AsyncSession, current_session: Sessions):
-        await session.delete(current_session)
-        await session.commit()
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, Index, select, update, delete
+from sqlalchemy import Integer, VARCHAR, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import Base
+
+
+class Sessions(Base):
+    __tablename__ = "sessions"
+
+    id = Column(Integer, autoincrement=True, primary_key=True)
+
+    user_id = Column(Integer, unique=True, index=True)
+    token = Column(VARCHAR(length=512), unique=True, index=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_sessions_expires_at", expires_at, postgresql_where=expires_at.isnot(None)),
+    )
+
+    @staticmethod
+    async def upsert_session(session: AsyncSession, user_id: int, token: str, expires_at: datetime) -> int:
+        table = Sessions.__table__
+        sql = insert(table).values(user_id=user_id, token=token, created_at=datetime.utcnow(), expires_at=expires_at)
+        sql = sql.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"token": sql.excluded.token, "created_at": sql.excluded.created_at, "expires_at": sql.excluded.expires_at},
+        ).returning(table.c.id)
+        res = await session.execute(sql)
+        await session.commit()
+        return res.scalar_one()
+
+    @staticmethod
+    async def rotate_session(session: AsyncSession, token: str, new_token: str, expires_at: datetime) -> int | None:
+        table = Sessions.__table__
+        now = datetime.utcnow()
+        sql = (
+            update(table)
+            .where(table.c.token == token, table.c.expires_at > now)
+            .values(token=new_token, created_at=now, expires_at=expires_at)
+            .returning(table.c.user_id)
+        )
+        res = await session.execute(sql)
+        await session.commit()
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def delete_session(session: AsyncSession, token: str) -> bool:
+        table = Sessions.__table__
+        res = await session.execute(delete(table).where(table.c.token == token))
+        await session.commit()
+        return res.rowcount > 0
+
+    @staticmethod
+    async def delete_user_session(session: AsyncSession, user_id: int):
+        table = Sessions.__table__
+        await session.execute(delete(table).where(table.c.user_id == user_id))
+        await session.commit()
+
+    @staticmethod
+    async def delete_expired_sessions(session: AsyncSession, batch_size: int) -> int:
+        table = Sessions.__table__
+        expired = select(table.c.id).where(table.c.expires_at <= datetime.utcnow()).limit(batch_size).with_for_update(skip_locked=True)
+        res = await session.execute(delete(table).where(table.c.id.in_(expired)))
+        await session.commit()
+        return res.rowcount
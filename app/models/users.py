@@ -1,36 +1,123 @@
-from __future__ import annotations
-
-from datetime import datetime
-
-from sqlalchemy import Column, select, or_
-from sqlalchemy import Integer, VARCHAR, DateTime
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from ..database.connection import Base
-
-
-class Users(Base):
-    __tablename__ = "users"
-
-    id = Column(Integer, autoincrement=True, primary_key=True, index=True)
-
-    username = Column(VARCHAR(length=64), unique=True, nullable=False, index=True)
-    full_name = Column(VARCHAR(length=64), nullable=False, index=True)
-
-    email = Column(VARCHAR(length=64), nullable=False, unique=True, index=True)
-    password = Column(VARCHAR(length=128), nullable=False, index=True)
-
-    created_at = Column(DateTime, index=True, default=datetime.utcnow)
-
-    @staticmethod
-    async def create_user(session: AsyncSession, full_name: str, username: str, email: str, password: str) -> Users:
-        user = Users(full_name=full_name, username=username, email=email, password=password)
-        session.add(user)
-        await session.commit()
-        return user
-
-    @staticmethod
-    async def find_user(session: AsyncSession, id: int = None, username: str = None, email: str = None) -> Users:
-        sql = select(Users).filter(or_(Users.id == id, Users.username == username, Users.email == email))
-        res = await session.execute(sql)
-        return res.scalars().first()
+from __future__ import annotations
+
+from datetime import datetime
+
+from typing import AsyncIterator
+
+from sqlalchemy import Column, Table, MetaData, select, or_, any_, literal, literal_column, exists
+from sqlalchemy import Integer, VARCHAR, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import Base
+from ..database.copy import copy_to_staging
+from ..pkg import UsersCache
+
+import_staging = Table(
+    "users_import",
+    MetaData(),
+    Column("ord", Integer),
+    Column("username", VARCHAR(length=64)),
+    Column("full_name", VARCHAR(length=64)),
+    Column("email", VARCHAR(length=64)),
+    Column("password", VARCHAR(length=128)),
+    Column("created_at", DateTime),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+class Users(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, autoincrement=True, primary_key=True)
+
+    username = Column(VARCHAR(length=64), unique=True, nullable=False, index=True)
+    full_name = Column(VARCHAR(length=64), nullable=False)
+
+    email = Column(VARCHAR(length=64), nullable=False, unique=True, index=True)
+    password = Column(VARCHAR(length=128), nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    async def create_user(session: AsyncSession, full_name: str, username: str, email: str, password: str) -> Users:
+        user = Users(full_name=full_name, username=username, email=email, password=password)
+        session.add(user)
+        await session.commit()
+        return user
+
+    @staticmethod
+    async def find_user(session: AsyncSession, id: int = None, username: str = None, email: str = None) -> Users:
+        sql = select(Users).filter(or_(Users.id == id, Users.username == username, Users.email == email))
+        res = await session.execute(sql)
+        return res.scalars().first()
+
+    @staticmethod
+    async def update_password(session: AsyncSession, user: Users, password: str) -> Users:
+        user.password = password
+        await session.commit()
+        return user
+
+    @staticmethod
+    async def stream_export(session: AsyncSession, chunk_size: int = 1000) -> AsyncIterator[Row]:
+        table = Users.__table__
+        sql = select(table.c.id, table.c.username, table.c.full_name, table.c.email, table.c.password, table.c.created_at).order_by(table.c.id).execution_options(yield_per=chunk_size)
+        return await session.stream(sql)
+
+    @staticmethod
+    async def import_users(session: AsyncSession, records: list[tuple], update: bool = False) -> tuple[int, int]:
+        table, staging = Users.__table__, import_staging
+        await copy_to_staging(session, staging, records)
+        by_email = select(staging).distinct(staging.c.email).order_by(staging.c.email, staging.c.ord.desc()).subquery()
+        taken = exists().where(table.c.email == by_email.c.email, table.c.username != by_email.c.username)
+        rows = (
+            select(by_email.c.username, by_email.c.full_name, by_email.c.email, by_email.c.password, by_email.c.created_at)
+            .where(~taken)
+            .distinct(by_email.c.username)
+            .order_by(by_email.c.username, by_email.c.ord.desc())
+        )
+        sql = insert(table).from_select(["username", "full_name", "email", "password", "created_at"], rows)
+        if update:
+            sql = sql.on_conflict_do_update(
+                index_elements=[table.c.username],
+                set_={"full_name": sql.excluded.full_name, "email": sql.excluded.email, "password": sql.excluded.password},
+            )
+        else:
+            sql = sql.on_conflict_do_nothing(index_elements=[table.c.username])
+        res = await session.execute(sql.returning(table.c.id, literal_column("xmax = 0").label("inserted")))
+        merged = res.all()
+        await session.commit()
+        updated = [row.id for row in merged if not row.inserted]
+        if updated:
+            await UsersCache.delete(*(Users._cache_key(user_id) for user_id in updated))
+        return len(merged) - len(updated), len(updated)
+
+    @staticmethod
+    def _cache_key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    @staticmethod
+    async def find_profiles_by_ids(session: AsyncSession, ids: list[int]) -> list[Row]:
+        if not ids:
+            return []
+        sql = select(Users.id, Users.full_name, Users.username).where(Users.id == any_(literal(ids, ARRAY(Integer))))
+        res = await session.execute(sql)
+        return res.all()
+
+    @staticmethod
+    async def get_profiles(session: AsyncSession, ids: list[int]) -> dict[int, dict]:
+        cached = await UsersCache.get_many([Users._cache_key(user_id) for user_id in ids])
+        profiles, missing = {}, []
+        for user_id in ids:
+            profile = cached.get(Users._cache_key(user_id))
+            if profile is not None:
+                profiles[user_id] = profile
+            else:
+                missing.append(user_id)
+
+        for row in await Users.find_profiles_by_ids(session, ids=missing):
+            profile = profiles[row.id] = dict(row._mapping)
+            await UsersCache.set(Users._cache_key(row.id), profile)
+        return profiles
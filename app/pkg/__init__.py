@@ -1,5 +1,62 @@
-from .cryptography import JWT, Hashlibrary
-from .. import config
-
-JWT = JWT(secret_key=config.SECRET_KEY, algorithm=config.ALGORITHM)
-Hashlibrary = Hashlibrary(password_salt=config.PASSWORD_SECRET_SALT)
+from .cache import LRUCache, RedisBackend
+from .counters import ReactionCounter
+from .cryptography import JWT, Hashlibrary, load_keys
+from .live import LiveHub, PostgresRelay
+from .metrics import registry
+from .ranking import HotPosts
+from .reactions import ReactionIndex
+from .ratelimit import RateLimiter, MemoryBackend as RateLimitMemoryBackend, RedisBackend as RateLimitRedisBackend
+from .. import config
+
+RELAY_DSN = config.DATABASE_URI.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+JWT = JWT(
+    secret_key=config.SECRET_KEY,
+    algorithm=config.ALGORITHM,
+    keys=load_keys(config.JWT_KEYS_DIR),
+    active_kid=config.JWT_ACTIVE_KID,
+    accept_legacy=config.JWT_ACCEPT_LEGACY,
+)
+Hashlibrary = Hashlibrary(
+    password_salt=config.PASSWORD_SECRET_SALT,
+    workers=config.PASSWORD_HASH_WORKERS,
+    max_queue=config.PASSWORD_HASH_MAX_QUEUE,
+    n=config.PASSWORD_SCRYPT_N,
+    r=config.PASSWORD_SCRYPT_R,
+    p=config.PASSWORD_SCRYPT_P,
+)
+PostsCache = LRUCache(
+    maxsize=config.POSTS_CACHE_SIZE,
+    ttl=config.POSTS_CACHE_TTL,
+    backend=RedisBackend(config.CACHE_URI) if config.CACHE_URI else None,
+    local_ttl=config.POSTS_CACHE_LOCAL_TTL,
+)
+UsersCache = LRUCache(maxsize=config.USERS_CACHE_SIZE, ttl=config.USERS_CACHE_TTL)
+
+
+def _cache_metric(key: str):
+    return lambda: [((name,), cache.stats()[key]) for name, cache in (("posts", PostsCache), ("users", UsersCache))]
+
+
+registry.gauge("cache_size", "Entries held in the in-process cache.", ("cache",), collect=_cache_metric("size"))
+for key in ("hits", "misses", "evictions"):
+    registry.counter(f"cache_{key}_total", f"Cache {key} since start.", ("cache",), collect=_cache_metric(key))
+
+HotPosts = HotPosts(capacity=config.HOT_POSTS_CAPACITY, decay=config.HOT_POSTS_DECAY)
+ReactionIndex = ReactionIndex(
+    maxsize=config.REACTIONS_INDEX_SIZE,
+    ttl=config.REACTIONS_INDEX_TTL,
+    interval=config.REACTIONS_INDEX_INTERVAL,
+    relay=PostgresRelay(RELAY_DSN, channel=config.REACTIONS_INDEX_CHANNEL) if config.REACTIONS_INDEX_RELAY == "postgres" else None,
+)
+ReactionCounter = ReactionCounter(interval=config.REACTIONS_FLUSH_INTERVAL, threshold=config.REACTIONS_FLUSH_THRESHOLD)
+RateLimiter = RateLimiter(
+    policies=config.RATE_LIMIT_POLICIES,
+    backend=RateLimitRedisBackend(config.RATE_LIMIT_URI) if config.RATE_LIMIT_URI else RateLimitMemoryBackend(shards=config.RATE_LIMIT_SHARDS, maxsize=config.RATE_LIMIT_MAX_KEYS),
+)
+LiveHub = LiveHub(
+    interval=config.POSTS_LIVE_INTERVAL,
+    max_subscribers=config.POSTS_LIVE_MAX_SUBSCRIBERS,
+    max_per_owner=config.POSTS_LIVE_MAX_PER_USER,
+    relay=PostgresRelay(RELAY_DSN, channel=config.POSTS_LIVE_CHANNEL) if config.POSTS_LIVE_RELAY == "postgres" else None,
+)
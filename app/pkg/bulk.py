@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+from datetime import date
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+import ujson
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def encode_ndjson(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> str:
+    return "".join(ujson.dumps({column: _plain(value) for column, value in zip(columns, row)}, ensure_ascii=False) + "\n" for row in rows)
+
+
+def encode_csv(columns: Sequence[str] | None, rows: Iterable[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if columns is not None:
+        writer.writerow(columns)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+class RecordReader:
+    def __init__(self, format: str):
+        self.format = format
+        self.line = 0
+        self.header: list[str] | None = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._record = ""
+
+    def feed(self, chunk: bytes, final: bool = False) -> list[dict]:
+        self._buffer += self._decoder.decode(chunk, final=final)
+        *lines, self._buffer = self._buffer.split("\n")
+        if final:
+            lines.append(self._buffer)
+            self._buffer = ""
+        records = []
+        for line in lines:
+            self.line += 1
+            record = self._ndjson(line) if self.format == "ndjson" else self._csv(line)
+            if record is not None:
+                records.append(record)
+        if final and self._record:
+            raise ValueError(f"line {self.line}: unterminated quoted field")
+        return records
+
+    def _ndjson(self, line: str) -> dict | None:
+        if not line.strip():
+            return None
+        try:
+            record = ujson.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {self.line}: {e}")
+        if not isinstance(record, dict):
+            raise ValueError(f"line {self.line}: expected a JSON object")
+        return record
+
+    def _csv(self, line: str) -> dict | None:
+        self._record += line
+        if self._record.count('"') % 2:
+            self._record += "\n"
+            return None
+        record, self._record = self._record.rstrip("\r"), ""
+        if not record:
+            return None
+        values = next(csv.reader([record]))
+        if self.header is None:
+            self.header = values
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"line {self.line}: expected {len(self.header)} fields, got {len(values)}")
+        return dict(zip(self.header, values))
+
+
+async def read_records(chunks: AsyncIterator[bytes], format: str, batch_size: int) -> AsyncIterator[list[dict]]:
+    reader = RecordReader(format)
+    batch: list[dict] = []
+    async for chunk in chunks:
+        batch.extend(reader.feed(chunk))
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            del batch[:batch_size]
+    batch.extend(reader.feed(b"", final=True))
+    while batch:
+        yield batch[:batch_size]
+        del batch[:batch_size]
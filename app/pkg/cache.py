@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import pickle
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        ...
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        return [await self.get(key) for key in keys]
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self):
+        self._data: dict[str, tuple[float, Any]] = {}
+
+    async def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+
+class RedisBackend(CacheBackend):
+    def __init__(self, uri: str, prefix: str = "webtronics:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("redis package is required for CACHE_URI") from e
+        self.client = redis.from_url(uri)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        if not keys:
+            return []
+        raws = await self.client.mget([self.prefix + key for key in keys])
+        return [pickle.loads(raw) if raw is not None else None for raw in raws]
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.client.set(self.prefix + key, pickle.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0, backend: CacheBackend | None = None, local_ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.local_ttl = ttl if backend is None or local_ttl is None else min(local_ttl, ttl)
+
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+
+        if self.backend is not None:
+            value = await self.backend.get(key)
+            if value is not None:
+                self._put(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        found, missing = {}, []
+        now = time.monotonic()
+        for key in keys:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(key)
+                found[key] = item[1]
+            else:
+                missing.append(key)
+
+        if missing and self.backend is not None:
+            for key, value in zip(missing, await self.backend.get_many(missing)):
+                if value is not None:
+                    self._put(key, value)
+                    found[key] = value
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set(self, key: str, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._put(key, value, ttl)
+        if self.backend is not None:
+            await self.backend.set(key, value, ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+        if self.backend is not None:
+            await self.backend.delete(*keys)
+
+    def _put(self, key: str, value: Any, ttl: float | None = None):
+        ttl = self.local_ttl if ttl is None else min(ttl, self.local_ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
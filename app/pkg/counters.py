@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+Deltas = dict[int, list[int]]
+
+
+class ReactionCounter:
+    def __init__(self, interval: float = 1.0, threshold: int = 1000):
+        self.interval = interval
+        self.threshold = threshold
+
+        self._pending: Deltas = {}
+        self._inflight: Deltas = {}
+        self._touched: dict[int, datetime] = {}
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._session_factory: Callable[[], AsyncSession] | None = None
+        self._flush: Callable[[AsyncSession, Deltas], Awaitable[Any]] | None = None
+        self._committed: Callable[[Any], Awaitable[Any]] | None = None
+
+    def start(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        flush: Callable[[AsyncSession, Deltas], Awaitable[Any]],
+        committed: Callable[[Any], Awaitable[Any]] | None = None,
+    ):
+        self._session_factory = session_factory
+        self._flush = flush
+        self._committed = committed
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def add(self, post_id: int, likes: int = 0, dislikes: int = 0):
+        delta = self._pending.setdefault(post_id, [0, 0])
+        delta[0] += likes
+        delta[1] += dislikes
+        self._touched[post_id] = datetime.utcnow()
+        self._size += 1
+        if self._size >= self.threshold:
+            self._wakeup.set()
+
+    def discard(self, post_id: int):
+        self._pending.pop(post_id, None)
+        self._touched.pop(post_id, None)
+
+    def pending(self, post_id: int) -> tuple[int, int]:
+        likes = dislikes = 0
+        for deltas in (self._pending, self._inflight):
+            delta = deltas.get(post_id)
+            if delta is not None:
+                likes += delta[0]
+                dislikes += delta[1]
+        return likes, dislikes
+
+    def touched(self, post_id: int) -> datetime | None:
+        return self._touched.get(post_id)
+
+    def apply(self, data: dict) -> dict:
+        likes, dislikes = self.pending(data["id"])
+        if likes or dislikes:
+            data["like_count"] += likes
+            data["dislike_count"] += dislikes
+        return data
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending or self._flush is None:
+                return
+            pending, self._pending, self._size = self._pending, {}, 0
+            self._inflight = pending
+            try:
+                try:
+                    async with self._session_factory() as session:
+                        result = await self._flush(session, pending)
+                except Exception:
+                    logger.exception("failed to flush %d reaction deltas, requeueing", len(pending))
+                    for post_id, (likes, dislikes) in pending.items():
+                        delta = self._pending.setdefault(post_id, [0, 0])
+                        delta[0] += likes
+                        delta[1] += dislikes
+                    self._size += len(pending)
+                    return
+                if self._committed is not None:
+                    try:
+                        await self._committed(result)
+                    except Exception:
+                        logger.exception("reaction deltas for %d posts were committed, but the post-commit step failed", len(pending))
+            finally:
+                self._inflight = {}
+                for post_id in pending:
+                    if post_id not in self._pending:
+                        self._touched.pop(post_id, None)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
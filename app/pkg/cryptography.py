@@ -1,54 +1,242 @@
-import datetime
-import hashlib
-
-import jwt
-
-from ..schemas import Model
-
-
-class PayloadSchema(Model):
-    user_id: int
-    exp: datetime.datetime
-
-class JWT:
-    def __init__(self, secret_key: str, algorithm: str = "HS256"):
-        self.secret_key = secret_key
-        self.algorithm = algorithm
-
-    async def _encode(self, payload: PayloadSchema) -> str:
-        return jwt.encode(payload=payload.dict(), key=self.secret_key, algorithm=self.algorithm)
-
-    async def _decode(self, token: str) -> PayloadSchema:
-        return PayloadSchema(**jwt.decode(jwt=token, key=self.secret_key, algorithms=[self.algorithm]))
-
-    async def create_token(self, user_id: str, timedelta: datetime.timedelta = datetime.timedelta(minutes=30)) -> str:
-        payload = PayloadSchema(
-            user_id=user_id,
-            exp=datetime.datetime.utcnow() + timedelta
-        )
-
-        return await self._encode(payload)
-
-    async def verify_token(self, token: str) -> PayloadSchema:
-        payload = await self._decode(token)
-        # custom errors
-        return payload
-
-    class ExpiredSignatureError(jwt.exceptions.ExpiredSignatureError):
-        pass
-
-    class InvalidSignatureError(jwt.exceptions.InvalidSignatureError):
-        pass
-
-    class DecodeError(jwt.exceptions.DecodeError):
-        pass
-
-
-class Hashlibrary:
-    def __init__(self, password_salt: str):
-        self.password_salt = password_salt
-
-    def SHA256(self, data: str | bytes) -> str:
-        if isinstance(data, str):
-            return hashlib.sha3_256(data.encode()).hexdigest()
-        return hashlib.sha3_256(data).hexdigest()
+import asyncio
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+from .metrics import jwt_duration, password_hash_duration
+from ..schemas import Model
+
+
+class PayloadSchema(Model):
+    user_id: int
+    exp: datetime.datetime
+
+class JWTKey:
+    def __init__(self, kid: str | None, algorithm: str, signing_key: Any, verifying_key: Any):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+    @staticmethod
+    def from_pem(kid: str, data: bytes) -> "JWTKey":
+        if b"PRIVATE KEY" in data:
+            signing_key = serialization.load_pem_private_key(data, password=None)
+            verifying_key = signing_key.public_key()
+        else:
+            signing_key, verifying_key = None, serialization.load_pem_public_key(data)
+
+        if isinstance(verifying_key, ed25519.Ed25519PublicKey):
+            algorithm = "EdDSA"
+        elif isinstance(verifying_key, ec.EllipticCurvePublicKey) and isinstance(verifying_key.curve, ec.SECP256R1):
+            algorithm = "ES256"
+        else:
+            raise ValueError(f"key {kid} must be Ed25519 or P-256")
+        return JWTKey(kid, algorithm, signing_key, verifying_key)
+
+    def jwk(self) -> dict[str, str]:
+        encoder = OKPAlgorithm if self.algorithm == "EdDSA" else ECAlgorithm
+        data = json.loads(encoder.to_jwk(self.verifying_key))
+        data.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return data
+
+
+def load_keys(path: str) -> list[JWTKey]:
+    if not path:
+        return []
+    return [JWTKey.from_pem(file.stem, file.read_bytes()) for file in sorted(Path(path).glob("*.pem"))]
+
+
+class JWT:
+    def __init__(self, secret_key: str, algorithm: str = "HS256", keys: list[JWTKey] | None = None, active_kid: str | None = None, accept_legacy: bool = True):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.keys = {key.kid: key for key in keys or []}
+
+        legacy = JWTKey(None, algorithm, secret_key, secret_key)
+        if self.keys:
+            signers = [key for key in self.keys.values() if key.signing_key is not None and (not active_kid or key.kid == active_kid)]
+            if not signers:
+                raise ValueError(f"no private key found for JWT signing (active kid {active_kid!r})")
+            self.signer = signers[-1]
+            if accept_legacy and algorithm.startswith("HS"):
+                self.keys[None] = legacy
+        else:
+            self.signer = legacy
+            self.keys[None] = legacy
+
+    def _headers(self) -> dict[str, str] | None:
+        return {"kid": self.signer.kid} if self.signer.kid else None
+
+    async def _encode(self, payload: PayloadSchema) -> str:
+        with jwt_duration.time("encode"):
+            return jwt.encode(payload=payload.dict(), key=self.signer.signing_key, algorithm=self.signer.algorithm, headers=self._headers())
+
+    async def _decode(self, token: str) -> PayloadSchema:
+        with jwt_duration.time("decode"):
+            key = self.keys.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise jwt.exceptions.InvalidSignatureError("unknown signing key")
+            return PayloadSchema(**jwt.decode(jwt=token, key=key.verifying_key, algorithms=[key.algorithm]))
+
+    async def create_token(self, user_id: str, timedelta: datetime.timedelta = datetime.timedelta(minutes=30)) -> str:
+        payload = PayloadSchema(
+            user_id=user_id,
+            exp=datetime.datetime.utcnow() + timedelta
+        )
+
+        return await self._encode(payload)
+
+    async def verify_token(self, token: str) -> PayloadSchema:
+        payload = await self._decode(token)
+        # custom errors
+        return payload
+
+    def jwks(self) -> dict[str, list[dict[str, str]]]:
+        return {"keys": [key.jwk() for kid, key in self.keys.items() if kid is not None]}
+
+    class ExpiredSignatureError(jwt.exceptions.ExpiredSignatureError):
+        pass
+
+    class InvalidSignatureError(jwt.exceptions.InvalidSignatureError):
+        pass
+
+    class DecodeError(jwt.exceptions.DecodeError):
+        pass
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: OrderedDict[bytes, tuple[float, PayloadSchema]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> PayloadSchema | None:
+        key = self._key(token)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return payload
+
+    def set(self, token: str, payload: PayloadSchema):
+        expires_at = payload.exp.replace(tzinfo=payload.exp.tzinfo or datetime.timezone.utc).timestamp()
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._data[key] = (expires_at, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class Hashlibrary:
+    def __init__(self, password_salt: str, workers: int = 4, max_queue: int = 64, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        self.password_salt = password_salt
+        self.n = n
+        self.r = r
+        self.p = p
+        self.max_queue = max_queue
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hashlibrary")
+        self._semaphore = asyncio.Semaphore(workers)
+        self._pending = 0
+
+    def SHA256(self, data: str | bytes) -> str:
+        if isinstance(data, str):
+            return hashlib.sha3_256(data.encode()).hexdigest()
+        return hashlib.sha3_256(data).hexdigest()
+
+    def _scrypt(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        peppered = hmac.new(self.password_salt.encode(), password.encode(), hashlib.sha256).digest()
+        return hashlib.scrypt(peppered, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        if self._pending >= self.max_queue:
+            raise Hashlibrary.Overloaded(f"{self._pending} password hashes are already pending")
+
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash_password(self, password: str) -> str:
+        salt = os.urandom(16)
+        with password_hash_duration.time("hash", "scrypt"):
+            digest = await self._run(self._scrypt, password, salt, self.n, self.r, self.p)
+        return "$".join(["scrypt", str(self.n), str(self.r), str(self.p), _b64encode(salt), _b64encode(digest)])
+
+    @staticmethod
+    def _parse_scrypt(hashed: str) -> tuple[int, int, int, bytes, bytes] | None:
+        fields = hashed.split("$")
+        if len(fields) != 6 or fields[0] != "scrypt":
+            return None
+        try:
+            n, r, p = int(fields[1]), int(fields[2]), int(fields[3])
+            salt, digest = _b64decode(fields[4]), _b64decode(fields[5])
+        except ValueError:
+            return None
+        if not (1 < n <= 2 ** 20 and n & (n - 1) == 0 and 1 <= r <= 32 and 1 <= p <= 16 and salt and len(digest) == 32):
+            return None
+        return n, r, p, salt, digest
+
+    @staticmethod
+    def is_password_hash(hashed: str) -> bool:
+        if hashed.startswith("scrypt$"):
+            return Hashlibrary._parse_scrypt(hashed) is not None
+        return len(hashed) == 64 and all(char in "0123456789abcdef" for char in hashed)
+
+    async def verify_password(self, password: str, hashed: str) -> tuple[bool, bool]:
+        if not hashed.startswith("scrypt$"):
+            with password_hash_duration.time("verify", "sha3"):
+                return hmac.compare_digest(self.SHA256(password), hashed), True
+
+        parsed = self._parse_scrypt(hashed)
+        if parsed is None:
+            return False, False
+        n, r, p, salt, digest = parsed
+        with password_hash_duration.time("verify", "scrypt"):
+            expected = await self._run(self._scrypt, password, salt, n, r, p)
+        if not hmac.compare_digest(expected, digest):
+            return False, False
+        return True, (n, r, p) != (self.n, self.r, self.p)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    class Overloaded(Exception):
+        pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4), validate=True)
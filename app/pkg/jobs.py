@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import datetime
+
+
+class Job:
+    __slots__ = ("id", "kind", "table", "format", "status", "rows", "inserted", "updated", "error", "started_at", "finished_at", "_saved_at")
+
+    def __init__(
+        self,
+        kind: str,
+        table: str,
+        format: str,
+        id: str | None = None,
+        status: str = "running",
+        rows: int = 0,
+        inserted: int = 0,
+        updated: int = 0,
+        error: str | None = None,
+        started_at: datetime | None = None,
+        finished_at: datetime | None = None,
+    ):
+        self.id = id or uuid.uuid4().hex
+        self.kind = kind
+        self.table = table
+        self.format = format
+        self.status = status
+        self.rows = rows
+        self.inserted = inserted
+        self.updated = updated
+        self.error = error
+        self.started_at = started_at or datetime.utcnow()
+        self.finished_at = finished_at
+        self._saved_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    def advance(self, rows: int, inserted: int = 0, updated: int = 0):
+        self.rows += rows
+        self.inserted += inserted
+        self.updated += updated
+
+    def finish(self):
+        self.status = "done"
+        self.finished_at = datetime.utcnow()
+
+    def fail(self, error: str):
+        self.status = "failed"
+        self.error = error
+        self.finished_at = datetime.utcnow()
+
+    def due(self, interval: float) -> bool:
+        now = time.monotonic()
+        if now - self._saved_at < interval:
+            return False
+        self._saved_at = now
+        return True
+
+    def dump(self) -> dict:
+        elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds() or 1e-9
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "table": self.table,
+            "format": self.format,
+            "status": self.status,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.rows - self.inserted - self.updated if self.kind == "import" else 0,
+            "rows_per_second": round(self.rows / elapsed, 1),
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": None if self.finished_at is None else self.finished_at.isoformat(),
+        }
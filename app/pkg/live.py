@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+
+import asyncpg
+import ujson
+
+logger = logging.getLogger(__name__)
+
+Updates = dict[int, dict[str, Any]]
+
+
+def merge(updates: Updates, post_id: int, data: dict[str, Any]):
+    current = updates.get(post_id)
+    if current is None:
+        updates[post_id] = dict(data)
+    else:
+        current.update(data)
+
+
+class Subscription:
+    __slots__ = ("ids", "owner", "updates", "event", "active")
+
+    def __init__(self, ids: list[int], owner: int | None = None):
+        self.ids = frozenset(ids)
+        self.owner = owner
+        self.updates: Updates = {}
+        self.event = asyncio.Event()
+        self.active = True
+
+    def push(self, post_id: int, data: dict[str, Any]):
+        merge(self.updates, post_id, data)
+        self.event.set()
+
+    async def next(self, timeout: float) -> Updates:
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self.event.clear()
+        updates, self.updates = self.updates, {}
+        return updates
+
+
+class Relay(ABC):
+    _receive: Callable[[Updates], None] | None = None
+
+    def listen(self, receive: Callable[[Updates], None]):
+        self._receive = receive
+
+    @abstractmethod
+    async def publish(self, updates: Updates):
+        ...
+
+    async def stop(self):
+        pass
+
+
+class PostgresRelay(Relay):
+    MAX_PAYLOAD = 7900
+
+    def __init__(self, dsn: str, channel: str = "posts_live", retry: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.retry = retry
+        self.origin = uuid.uuid4().hex
+
+        self._conn: asyncpg.Connection | None = None
+        self._retry_at = 0.0
+
+    async def _connection(self) -> asyncpg.Connection | None:
+        if self._conn is not None and not self._conn.is_closed():
+            return self._conn
+        if time.monotonic() < self._retry_at:
+            return None
+        try:
+            conn = await asyncpg.connect(self.dsn)
+            await conn.add_listener(self.channel, self._notify)
+        except Exception as e:
+            logger.warning("live relay cannot connect, retrying in %.0fs: %s", self.retry, e)
+            self._retry_at = time.monotonic() + self.retry
+            return None
+        self._conn = conn
+        return conn
+
+    def _notify(self, conn, pid: int, channel: str, payload: str):
+        try:
+            message = ujson.loads(payload)
+            if message["origin"] == self.origin or self._receive is None:
+                return
+            updates = {int(post_id): dict(data) for post_id, data in message["updates"].items()}
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning("ignoring malformed notification on %s: %r", channel, e)
+            return
+        self._receive(updates)
+
+    def _payloads(self, updates: Updates) -> list[str]:
+        payloads, chunk, size = [], {}, 0
+        for post_id, data in updates.items():
+            item = len(ujson.dumps(data)) + 16
+            if chunk and size + item > self.MAX_PAYLOAD:
+                payloads.append(ujson.dumps({"origin": self.origin, "updates": chunk}))
+                chunk, size = {}, 0
+            chunk[post_id] = data
+            size += item
+        if chunk:
+            payloads.append(ujson.dumps({"origin": self.origin, "updates": chunk}))
+        return payloads
+
+    async def publish(self, updates: Updates):
+        conn = await self._connection()
+        if conn is None or not updates:
+            return
+        for payload in self._payloads(updates):
+            await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def stop(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+class LiveHub:
+    def __init__(self, interval: float = 1.0, max_subscribers: int = 10000, max_per_owner: int = 0, relay: Relay | None = None):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.max_per_owner = max_per_owner
+        self.relay = relay
+
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._count = 0
+        self._owners: dict[int, int] = {}
+        self._pending: Updates = {}
+        self._outgoing: Updates = {}
+        self._task: asyncio.Task | None = None
+
+        if relay is not None:
+            relay.listen(self.receive)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.relay is not None:
+            await self.relay.stop()
+
+    def owner_full(self, owner: int) -> bool:
+        return bool(self.max_per_owner) and self._owners.get(owner, 0) >= self.max_per_owner
+
+    def subscribe(self, ids: list[int], owner: int | None = None) -> Subscription | None:
+        if self._count >= self.max_subscribers:
+            return None
+        if owner is not None and self.owner_full(owner):
+            return None
+        subscription = Subscription(ids, owner)
+        for post_id in subscription.ids:
+            self._subscribers.setdefault(post_id, set()).add(subscription)
+        self._count += 1
+        if owner is not None:
+            self._owners[owner] = self._owners.get(owner, 0) + 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if not subscription.active:
+            return
+        subscription.active = False
+        for post_id in subscription.ids:
+            subscribers = self._subscribers.get(post_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[post_id]
+        self._count -= 1
+        if subscription.owner is not None:
+            remaining = self._owners.pop(subscription.owner, 1) - 1
+            if remaining:
+                self._owners[subscription.owner] = remaining
+
+    def publish(self, post_id: int, **data: Any):
+        if post_id in self._subscribers:
+            merge(self._pending, post_id, data)
+        if self.relay is not None:
+            merge(self._outgoing, post_id, data)
+
+    def receive(self, updates: Updates):
+        for post_id, data in updates.items():
+            if post_id in self._subscribers:
+                merge(self._pending, post_id, data)
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        for post_id, data in pending.items():
+            for subscription in self._subscribers.get(post_id, ()):
+                subscription.push(post_id, data)
+
+        outgoing, self._outgoing = self._outgoing, {}
+        if self.relay is not None:
+            try:
+                await self.relay.publish(outgoing)
+            except Exception:
+                logger.exception("failed to relay %d live updates", len(outgoing))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+import ujson
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = tuple[str, ...]
+Collect = Callable[[], Iterable[tuple[Labels, float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = (), collect: Collect | None = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, value: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def state(self) -> list[tuple[Labels, Any]]:
+        return list(self.collect() if self.collect is not None else self._values.items())
+
+    @staticmethod
+    def merge(current: Any, value: Any) -> Any:
+        return current + value
+
+    def samples(self, values: Iterable[tuple[Labels, Any]] | None = None, names: Labels | None = None) -> Iterator[str]:
+        for labels, value in self.state() if values is None else values:
+            yield f"{self.name}{_format_labels(names or self.labels, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._values: dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def state(self) -> list[tuple[Labels, Any]]:
+        return list(self._values.items())
+
+    @staticmethod
+    def merge(current: Any, value: Any) -> Any:
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2]]
+
+    def samples(self, values: Iterable[tuple[Labels, Any]] | None = None, names: Labels | None = None) -> Iterator[str]:
+        for labels, (counts, total, count) in self.state() if values is None else values:
+            cumulative = 0
+            for bound, value in zip(self.buckets + (float("inf"),), counts):
+                cumulative += value
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(names or self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(names or self.labels, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(names or self.labels, labels)} {count}"
+
+
+class Gauge:
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Labels = (), collect: Collect | None = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self._values: dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def state(self) -> list[tuple[Labels, Any]]:
+        return list(self.collect() if self.collect is not None else self._values.items())
+
+    def samples(self, values: Iterable[tuple[Labels, Any]] | None = None, names: Labels | None = None) -> Iterator[str]:
+        for labels, value in self.state() if values is None else values:
+            yield f"{self.name}{_format_labels(names or self.labels, labels)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.directory: Path | None = None
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def _register(self, metric):
+        metric.name = self.prefix + metric.name
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Labels = (), collect: Collect | None = None) -> Counter:
+        return self._register(Counter(name, help, labels, collect))
+
+    def histogram(self, name: str, help: str, labels: Labels = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: Labels = (), collect: Collect | None = None) -> Gauge:
+        return self._register(Gauge(name, help, labels, collect))
+
+    def share(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def dump(self):
+        if self.directory is None:
+            return
+        state = {name: metric.state() for name, metric in self._metrics.items()}
+        path = self.directory / f"{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(ujson.dumps(state))
+        temporary.replace(path)
+
+    def _shared(self) -> dict[str, dict[Labels, Any]]:
+        self.dump()
+        merged: dict[str, dict[Labels, Any]] = {name: {} for name in self._metrics}
+        for path in self.directory.glob("*.json"):
+            pid = int(path.stem)
+            alive = _alive(pid)
+            try:
+                state = ujson.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, values in state.items():
+                metric, series = self._metrics.get(name), merged.get(name)
+                if metric is None:
+                    continue
+                for labels, value in values:
+                    labels = tuple(labels)
+                    if metric.type == "gauge":
+                        if alive:
+                            series[labels + (str(pid),)] = value
+                    elif labels in series:
+                        series[labels] = metric.merge(series[labels], value)
+                    else:
+                        series[labels] = value
+        return merged
+
+    def render(self) -> str:
+        merged = self._shared() if self.directory is not None else None
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            if merged is None:
+                lines.extend(metric.samples())
+            else:
+                names = metric.labels + ("worker",) if metric.type == "gauge" else None
+                lines.extend(metric.samples(merged[metric.name].items(), names))
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class QueryStats:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+request_queries: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+
+registry = Registry(prefix="webtronics_")
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_request_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+http_request_queries = registry.histogram("http_request_db_queries", "Database queries issued per HTTP request.", ("method", "route"), COUNT_BUCKETS)
+http_request_db_duration = registry.histogram("http_request_db_duration_seconds", "Database time spent per HTTP request.", ("method", "route"))
+
+db_query_duration = registry.histogram("db_query_duration_seconds", "Database statement latency by engine and statement kind.", ("engine", "kind"))
+db_query_errors = registry.counter("db_query_errors_total", "Database statements that raised.", ("engine", "kind"))
+
+jwt_duration = registry.histogram("jwt_duration_seconds", "JWT encode/decode latency.", ("operation",), (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025))
+password_hash_duration = registry.histogram("password_hash_duration_seconds", "Password hash/verify latency including executor queueing.", ("operation", "scheme"))
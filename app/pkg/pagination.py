@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+
+def _encode(values: list[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode(cursor: str) -> list[Any]:
+    return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    return _encode([created_at.isoformat(), id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+
+
+def encode_rank_cursor(rank: float, id: int) -> str:
+    return _encode([rank, id])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        rank, id = _decode(cursor)
+        return float(rank), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
@@ -0,0 +1,52 @@
+import bisect
+import math
+from datetime import datetime
+from typing import Any, Iterable
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def hot_score(like_count: int, dislike_count: int, created_at: datetime, decay: float) -> float:
+    score = like_count - dislike_count
+    sign = (score > 0) - (score < 0)
+    return sign * math.log10(max(abs(score), 1)) + (created_at - EPOCH).total_seconds() / decay
+
+
+class HotPosts:
+    def __init__(self, capacity: int = 1000, decay: float = 45000.0):
+        self.capacity = capacity
+        self.decay = decay
+
+        self._keys: list[tuple[float, int]] = []
+        self._index: dict[int, tuple[float, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def offer(self, post_id: int, like_count: int, dislike_count: int, created_at: datetime):
+        self.remove(post_id)
+
+        key = (-hot_score(like_count, dislike_count, created_at, self.decay), -post_id)
+        if len(self._keys) >= self.capacity and key >= self._keys[-1]:
+            return
+
+        bisect.insort(self._keys, key)
+        self._index[post_id] = key
+
+        if len(self._keys) > self.capacity:
+            _, evicted = self._keys.pop()
+            del self._index[-evicted]
+
+    def remove(self, post_id: int):
+        key = self._index.pop(post_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def page(self, offset: int = 0, limit: int = 50) -> list[int]:
+        return [-post_id for _, post_id in self._keys[offset:offset + limit]]
+
+    def rebuild(self, posts: Iterable[Any]):
+        self._keys.clear()
+        self._index.clear()
+        for post in posts:
+            self.offer(post.id, post.like_count, post.dislike_count, post.created_at)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import math
+import re
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class RateLimitPolicy:
+    def __init__(self, name: str, rate: float, burst: int):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"rate limit policy {name!r} needs rate > 0 and burst >= 1, got [{rate}, {burst}]")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int, cost: int = 1) -> tuple[bool, float]:
+        ...
+
+
+class MemoryBackend(RateLimitBackend):
+    def __init__(self, shards: int = 16, maxsize: int = 100000):
+        self.shards = [OrderedDict() for _ in range(shards)]
+        self.shard_maxsize = max(maxsize // shards, 1)
+
+    def _shard(self, key: str) -> OrderedDict[str, list[float]]:
+        return self.shards[zlib.crc32(key.encode()) % len(self.shards)]
+
+    async def take(self, key: str, rate: float, burst: int, cost: int = 1) -> tuple[bool, float]:
+        shard = self._shard(key)
+        now = time.monotonic()
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = [float(burst), now]
+            while len(shard) > self.shard_maxsize:
+                shard.popitem(last=False)
+        else:
+            shard.move_to_end(key)
+
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return True, 0.0
+        bucket[0] = tokens
+        return False, (cost - tokens) / rate
+
+
+class RedisBackend(RateLimitBackend):
+    SCRIPT = """
+local tokens = tonumber(redis.call("HGET", KEYS[1], "tokens") or ARGV[2])
+local updated = tonumber(redis.call("HGET", KEYS[1], "updated") or ARGV[4])
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, uri: str, prefix: str = "webtronics:ratelimit:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("redis package is required for RATE_LIMIT_URI") from e
+        self.client = redis.from_url(uri)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int, cost: int = 1) -> tuple[bool, float]:
+        allowed, tokens = await self._script(keys=[self.prefix + key], args=[rate, burst, cost, time.time()])
+        if int(allowed):
+            return True, 0.0
+        return False, (cost - float(tokens)) / rate
+
+
+class RateLimiter:
+    def __init__(self, policies: dict[str, tuple[float, int]], backend: RateLimitBackend | None = None):
+        self.backend = backend or MemoryBackend()
+        self.default: RateLimitPolicy | None = None
+        self._routes: list[tuple[str, re.Pattern, RateLimitPolicy]] = []
+
+        for route, (rate, burst) in policies.items():
+            policy = RateLimitPolicy(name=route, rate=rate, burst=burst)
+            if route == "*":
+                self.default = policy
+                continue
+            method, path = route.split(" ", 1)
+            pattern = re.compile("^" + re.sub(r"\\{[^/]+?\\}", "[^/]+", re.escape(path)) + "$")
+            self._routes.append((method.upper(), pattern, policy))
+
+    def policy(self, method: str, path: str) -> RateLimitPolicy | None:
+        for route_method, pattern, policy in self._routes:
+            if route_method == method and pattern.match(path):
+                return policy
+        return self.default
+
+    async def hit(self, policy: RateLimitPolicy, principal: str) -> tuple[bool, int]:
+        allowed, retry_after = await self.backend.take(f"{policy.name}:{principal}", policy.rate, policy.burst)
+        return allowed, max(math.ceil(retry_after), 1)
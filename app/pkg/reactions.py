@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from .live import Relay, Updates
+
+logger = logging.getLogger(__name__)
+
+
+class UserReactions:
+    __slots__ = ("likes", "dislikes", "expires_at")
+
+    def __init__(self, likes: array, dislikes: array, expires_at: float):
+        self.likes = likes
+        self.dislikes = dislikes
+        self.expires_at = expires_at
+
+    @staticmethod
+    def _contains(ids: array, post_id: int) -> bool:
+        i = bisect.bisect_left(ids, post_id)
+        return i < len(ids) and ids[i] == post_id
+
+    @staticmethod
+    def _discard(ids: array, post_id: int):
+        i = bisect.bisect_left(ids, post_id)
+        if i < len(ids) and ids[i] == post_id:
+            del ids[i]
+
+    @staticmethod
+    def _add(ids: array, post_id: int):
+        i = bisect.bisect_left(ids, post_id)
+        if i == len(ids) or ids[i] != post_id:
+            ids.insert(i, post_id)
+
+    def get(self, post_id: int) -> int:
+        if self._contains(self.likes, post_id):
+            return 1
+        if self._contains(self.dislikes, post_id):
+            return -1
+        return 0
+
+    def set(self, post_id: int, value: int):
+        self._discard(self.likes, post_id)
+        self._discard(self.dislikes, post_id)
+        if value > 0:
+            self._add(self.likes, post_id)
+        elif value < 0:
+            self._add(self.dislikes, post_id)
+
+
+class ReactionIndex:
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0, interval: float = 0.5, relay: Relay | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.interval = interval
+        self.relay = relay
+
+        self._users: OrderedDict[int, UserReactions] = OrderedDict()
+        self._loading: dict[int, bool] = {}
+        self._outgoing: Updates = {}
+        self._task: asyncio.Task | None = None
+
+        if relay is not None:
+            relay.listen(self.receive)
+
+    def start(self):
+        if self.relay is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.flush()
+        if self.relay is not None:
+            await self.relay.stop()
+
+    def get(self, user_id: int) -> UserReactions | None:
+        reactions = self._users.get(user_id)
+        if reactions is None:
+            return None
+        if reactions.expires_at <= time.monotonic():
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return reactions
+
+    def begin(self, user_id: int):
+        self._loading.setdefault(user_id, False)
+
+    def cancel(self, user_id: int):
+        self._loading.pop(user_id, None)
+
+    def warm(self, user_id: int, rows: Iterable[Any]) -> UserReactions:
+        likes, dislikes = array("i"), array("i")
+        for row in rows:
+            (likes if row.value > 0 else dislikes).append(row.post_id)
+        reactions = UserReactions(array("i", sorted(likes)), array("i", sorted(dislikes)), time.monotonic() + self.ttl)
+
+        if not self._loading.pop(user_id, True):
+            self._users[user_id] = reactions
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+        return reactions
+
+    def set(self, user_id: int, post_id: int, value: int):
+        reactions = self._users.get(user_id)
+        if reactions is not None:
+            reactions.set(post_id, value)
+        elif user_id in self._loading:
+            self._loading[user_id] = True
+        if self.relay is not None:
+            self._outgoing.setdefault(user_id, {})[post_id] = value
+
+    def invalidate(self, user_id: int):
+        self._users.pop(user_id, None)
+        if user_id in self._loading:
+            self._loading[user_id] = True
+
+    def receive(self, updates: Updates):
+        for user_id in updates:
+            self.invalidate(user_id)
+
+    async def flush(self):
+        outgoing, self._outgoing = self._outgoing, {}
+        try:
+            await self.relay.publish(outgoing)
+        except Exception:
+            logger.exception("failed to relay reactions of %d users", len(outgoing))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
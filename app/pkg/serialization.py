@@ -0,0 +1,21 @@
+import datetime
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+
+def compile_encoder(schema: type[BaseModel], exclude: set[str] = frozenset()) -> Callable[[Any], dict]:
+    items = []
+    for name, field in schema.__fields__.items():
+        if name in exclude:
+            continue
+        if field.outer_type_ in (datetime.datetime, datetime.date):
+            items.append(f"{name!r}: None if row.{name} is None else row.{name}.isoformat()")
+        else:
+            items.append(f"{name!r}: row.{name}")
+
+    namespace: dict[str, Any] = {}
+    exec(f"def encode(row):\n    return {{{', '.join(items)}}}\n", namespace)
+    encode = namespace["encode"]
+    encode.__qualname__ = f"encode_{schema.__name__}"
+    return encode
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, interval: float, func: Callable[[], Awaitable[Any]]):
+        self.interval = interval
+        self.func = func
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("periodic task %s failed", getattr(self.func, "__qualname__", self.func))
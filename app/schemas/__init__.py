@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-
-
-class Model(BaseModel):
-    class Config:
-        orm_mode = True
+from pydantic import BaseModel
+
+
+class Model(BaseModel):
+    class Config:
+        orm_mode = True
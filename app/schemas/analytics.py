@@ -0,0 +1,16 @@
+import datetime
+
+from . import Model
+
+
+class ReactionBucketSchema(Model):
+    bucket: datetime.datetime
+    likes: int
+    dislikes: int
+
+
+class ReactionSeriesSchema(Model):
+    granularity: str
+    since: datetime.datetime
+    until: datetime.datetime
+    buckets: list[ReactionBucketSchema]
@@ -1,23 +1,56 @@
-import datetime
-
-from . import Model
-
-
-class CreatePostSchema(Model):
-    title: str
-    description: str
-
-
-class UpdatePostSchema(Model):
-    title: str | None
-    description: str | None
-
-
-class PostResponseSchema(Model):
-    id: int
-    user_id: int
-    title: str
-    description: str
-    like_count: int
-    dislike_count: int
-    created_at: datetime.datetime
+import datetime
+
+from . import Model
+from .users import UserProfileSchema
+
+
+class CreatePostSchema(Model):
+    title: str
+    description: str
+
+
+class UpdatePostSchema(Model):
+    title: str | None
+    description: str | None
+
+
+class PostResponseSchema(Model):
+    id: int
+    user_id: int
+    title: str
+    description: str
+    like_count: int
+    dislike_count: int
+    created_at: datetime.datetime
+    author: UserProfileSchema | None = None
+
+
+class PostPageSchema(Model):
+    items: list[PostResponseSchema]
+    next_cursor: str | None
+
+
+class PostConflictSchema(Model):
+    index: int
+    title: str
+    error: str
+
+
+class BulkCreatePostsSchema(Model):
+    created: list[PostResponseSchema]
+    conflicts: list[PostConflictSchema]
+
+
+class PostSearchResultSchema(PostResponseSchema):
+    rank: float
+    snippet: str
+
+
+class PostSearchPageSchema(Model):
+    items: list[PostSearchResultSchema]
+    next_cursor: str | None
+
+
+class PostReactionSchema(Model):
+    post_id: int
+    reaction: int
@@ -1,7 +1,11 @@
-from . import Model
-
-
-class UserResponseSchema(Model):
-    full_name: str
-    username: str
-    email: str
+from . import Model
+
+
+class UserProfileSchema(Model):
+    id: int
+    full_name: str
+    username: str
+
+
+class UserResponseSchema(UserProfileSchema):
+    email: str
@@ -0,0 +1,214 @@
+import logging
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import uvicorn
+
+from . import config
+
+logger = logging.getLogger("app.server")
+
+
+class Worker(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets: list[socket.socket] | None = None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class Launcher:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        backlog: int = 2048,
+        ready_timeout: float = 60.0,
+        stop_timeout: float = 30.0,
+        max_backoff: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.backlog = backlog
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.max_backoff = max_backoff
+
+        self.metrics_dir = config.METRICS_DIR
+        self.backoff = 0.0
+        self.respawn_at = 0.0
+        self.socket: socket.socket | None = None
+        self.children: dict[int, int] = {}
+        self.signals: list[int] = []
+
+    def bind(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(self.backlog)
+        self.socket.set_inheritable(True)
+
+    def spawn(self) -> tuple[int, int]:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                os.close(read_fd)
+                for other in self.children.values():
+                    os.close(other)
+                signal.signal(signal.SIGHUP, signal.SIG_IGN)
+                config.METRICS_DIR = self.metrics_dir
+                code = self.serve(write_fd)
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        self.children[pid] = read_fd
+        return pid, read_fd
+
+    def serve(self, ready_fd: int) -> int:
+        worker = Worker(uvicorn.Config("app.main:application", lifespan="on", proxy_headers=True, log_level="info"), ready_fd)
+        worker.run(sockets=[self.socket])
+        return 0 if worker.started else 1
+
+    def wait_ready(self, pid: int, read_fd: int) -> bool:
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            readable, _, _ = select.select([read_fd], [], [], 0.5)
+            if readable:
+                return os.read(read_fd, 1) == b"1"
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                self.forget(pid)
+                return False
+        return False
+
+    def forget(self, pid: int):
+        read_fd = self.children.pop(pid, None)
+        if read_fd is not None:
+            os.close(read_fd)
+
+    def stop(self, pid: int):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.forget(pid)
+            return
+        deadline = time.monotonic() + self.stop_timeout
+        while time.monotonic() < deadline:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                self.forget(pid)
+                return
+            time.sleep(0.1)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.forget(pid)
+
+    def start_worker(self) -> int | None:
+        pid, read_fd = self.spawn()
+        if self.wait_ready(pid, read_fd):
+            logger.info("worker %d is ready", pid)
+            return pid
+        logger.error("worker %d did not become ready within %.0fs", pid, self.ready_timeout)
+        if pid in self.children:
+            self.stop(pid)
+        return None
+
+    def reload(self):
+        logger.info("rolling reload of %d workers", len(self.children))
+        for old in list(self.children):
+            if self.start_worker() is None:
+                logger.error("aborting reload, keeping worker %d", old)
+                return
+            self.stop(old)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.children:
+                logger.warning("worker %d exited with status %d, respawning", pid, os.waitstatus_to_exitcode(status))
+                self.forget(pid)
+
+    def replenish(self):
+        while len(self.children) < self.workers and time.monotonic() >= self.respawn_at:
+            if self.start_worker() is not None:
+                self.backoff = 0.0
+                continue
+            self.backoff = min(max(self.backoff * 2, 1.0), self.max_backoff)
+            self.respawn_at = time.monotonic() + self.backoff
+            logger.warning("running %d of %d workers, retrying in %.0fs", len(self.children), self.workers, self.backoff)
+
+    def run(self) -> int:
+        owned = not self.metrics_dir
+        if owned:
+            self.metrics_dir = tempfile.mkdtemp(prefix="webtronics-metrics-")
+        else:
+            for stale in Path(self.metrics_dir).glob("*.json"):
+                stale.unlink()
+        try:
+            return self.serve_forever()
+        finally:
+            if owned:
+                shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def serve_forever(self) -> int:
+        self.bind()
+        logger.info("listening on %s:%d with %d workers", self.host, self.port, self.workers)
+        for _ in range(self.workers):
+            self.start_worker()
+        if not self.children:
+            logger.error("no worker could be started, exiting")
+            return 1
+
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: self.signals.append(signum))
+
+        while True:
+            while self.signals:
+                signum = self.signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self.reload()
+                else:
+                    logger.info("shutting down %d workers", len(self.children))
+                    for pid in list(self.children):
+                        os.kill(pid, signal.SIGTERM)
+                    for pid in list(self.children):
+                        self.stop(pid)
+                    return 0
+            self.reap()
+            self.replenish()
+            time.sleep(0.5)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s")
+    launcher = Launcher(
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=config.SERVER_WORKERS,
+        backlog=config.SERVER_BACKLOG,
+        ready_timeout=config.SERVER_READY_TIMEOUT,
+        stop_timeout=config.SERVER_STOP_TIMEOUT,
+    )
+    sys.exit(launcher.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import datetime
+import time
+
+from starlette.requests import Request
+
+from app.dependencies.auth import HTTPBearerScheme
+from app.pkg import JWT
+from app.pkg.cryptography import TokenCache
+
+
+def make_request(token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+async def measure(scheme: HTTPBearerScheme, request: Request, iterations: int) -> float:
+    await scheme(request)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await scheme(request)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main(iterations: int):
+    token = await JWT.create_token(user_id=1, timedelta=datetime.timedelta(minutes=30))
+    request = make_request(token)
+
+    uncached = await measure(HTTPBearerScheme(), request, iterations)
+    cached = await measure(HTTPBearerScheme(cache=TokenCache()), request, iterations)
+
+    print(f"uncached {uncached * 1e6:10.2f} us/request")
+    print(f"cached   {cached * 1e6:10.2f} us/request")
+    print(f"speedup  {uncached / cached:10.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request HTTPBearerScheme overhead with and without the verified-token cache")
+    parser.add_argument("--iterations", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().iterations))
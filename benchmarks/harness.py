@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from http.cookies import SimpleCookie
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlencode
+
+import ujson
+
+
+class Result:
+    def __init__(self, status: int, headers: dict[str, str], body: bytes, cookies: dict[str, str]):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.cookies = cookies
+
+    def json(self) -> Any:
+        return ujson.loads(self.body)
+
+
+class ASGIClient:
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        params: dict[str, Any] | list[tuple[str, Any]] | None = None,
+        headers: dict[str, str] | None = None,
+        cookies: dict[str, str] | None = None,
+    ) -> Result:
+        body = ujson.dumps(json).encode() if json is not None else b""
+        raw_headers = [(b"host", b"benchmark")]
+        if json is not None:
+            raw_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode(), value.encode()))
+        if cookies:
+            raw_headers.append((b"cookie", "; ".join(f"{name}={value}" for name, value in cookies.items()).encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(params or {}, doseq=True).encode(),
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+
+        sent, done = False, asyncio.Event()
+        status, response_headers, chunks = 0, [], []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status, response_headers = message["status"], message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+
+        decoded = {}
+        jar = SimpleCookie()
+        for name, value in response_headers:
+            name, value = name.decode().lower(), value.decode()
+            if name == "set-cookie":
+                jar.load(value)
+            else:
+                decoded[name] = value
+        return Result(status, decoded, b"".join(chunks), {name: morsel.value for name, morsel in jar.items()})
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def call(self, label: str, request: Awaitable[Result], expect: int | tuple[int, ...] = 200) -> Result:
+        start = time.perf_counter()
+        result = await request
+        self.latencies.setdefault(label, []).append(time.perf_counter() - start)
+        if result.status not in (expect if isinstance(expect, tuple) else (expect,)):
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return result
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000 if latencies else 0.0,
+        },
+    }
+
+
+async def run(step: Callable[[Recorder, int, int], Awaitable[Any]], iterations: int, concurrency: int) -> dict[str, Any]:
+    recorder = Recorder()
+    counter = iter(range(iterations))
+
+    async def worker(worker_id: int):
+        for i in counter:
+            await step(recorder, worker_id, i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    everything = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    report = summarize(everything, sum(recorder.errors.values()), elapsed)
+    report["elapsed"] = elapsed
+    report["routes"] = {label: summarize(latencies, recorder.errors.get(label, 0), elapsed) for label, latencies in recorder.latencies.items()}
+    return report
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    regressions = []
+    for name, report in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if report["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput']:.1f} -> {report['throughput']:.1f} req/s")
+        for key in ("p50", "p95", "p99"):
+            before, after = base["latency_ms"][key], report["latency_ms"][key]
+            if after > before * (1 + threshold):
+                regressions.append(f"{name}: {key} {before:.2f} -> {after:.2f} ms")
+        if report["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {report['errors']}")
+    return regressions
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import itertools
+import random
+from typing import Any, Awaitable, Callable
+
+from .harness import ASGIClient, Recorder
+
+Step = Callable[[Recorder, int, int], Awaitable[Any]]
+
+
+async def signup(client: ASGIClient, name: str) -> tuple[str, dict[str, str]]:
+    res = await client.request("POST", "/auth/signup", json={"full_name": name, "username": name, "email": f"{name}@bench.local", "password": "benchmark"})
+    if res.status != 201:
+        raise RuntimeError(f"signup failed for {name}: {res.status} {res.body[:200]!r}")
+    return res.json()["access_token"], res.cookies
+
+
+def bearer(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def auth_churn(client: ASGIClient, run_id: str, concurrency: int) -> Step:
+    sequence = itertools.count()
+
+    async def step(recorder: Recorder, worker_id: int, i: int):
+        name = f"{run_id}_auth_{next(sequence)}"
+        body = {"full_name": name, "username": name, "email": f"{name}@bench.local", "password": "benchmark"}
+        res = await recorder.call("POST /auth/signup", client.request("POST", "/auth/signup", json=body), expect=201)
+        res = await recorder.call("POST /auth/signin", client.request("POST", "/auth/signin", json={"username": name, "password": "benchmark"}))
+        await recorder.call("POST /auth/refresh", client.request("POST", "/auth/refresh", cookies=res.cookies))
+
+    return step
+
+
+async def posts_crud(client: ASGIClient, run_id: str, concurrency: int) -> Step:
+    tokens = [(await signup(client, f"{run_id}_crud_{worker_id}"))[0] for worker_id in range(concurrency)]
+    sequence = itertools.count()
+
+    async def step(recorder: Recorder, worker_id: int, i: int):
+        headers = bearer(tokens[worker_id])
+        body = {"title": f"{run_id} crud {next(sequence)}", "description": "lorem ipsum dolor sit amet " * 8}
+        res = await recorder.call("POST /posts/", client.request("POST", "/posts/", json=body, headers=headers), expect=201)
+        if res.status != 201:
+            return
+        post_id = res.json()["id"]
+        await recorder.call("GET /posts/{post_id}", client.request("GET", f"/posts/{post_id}", headers=headers))
+        await recorder.call("PUT /posts/{post_id}", client.request("PUT", f"/posts/{post_id}", json={"description": "updated " * 8}, headers=headers))
+        await recorder.call("DELETE /posts/{post_id}", client.request("DELETE", f"/posts/{post_id}", headers=headers))
+
+    return step
+
+
+async def hot_likes(client: ASGIClient, run_id: str, concurrency: int) -> Step:
+    author, _ = await signup(client, f"{run_id}_hot_author")
+    res = await client.request("POST", "/posts/", json={"title": f"{run_id} hot post", "description": "contended"}, headers=bearer(author))
+    post_id = res.json()["id"]
+    tokens = [(await signup(client, f"{run_id}_hot_{worker_id}"))[0] for worker_id in range(concurrency)]
+    reactions: list[str | None] = [None] * concurrency
+
+    # every step changes the worker's reaction, so no request is a no-op
+    async def step(recorder: Recorder, worker_id: int, i: int):
+        headers, current = bearer(tokens[worker_id]), reactions[worker_id]
+        if current is None:
+            action = "like" if random.random() < 0.8 else "dislike"
+            res = await recorder.call(f"POST /posts/{{post_id}}/{action}", client.request("POST", f"/posts/{post_id}/{action}", headers=headers))
+        elif random.random() < 0.8:
+            action = None
+            res = await recorder.call("DELETE /posts/{post_id}/reaction", client.request("DELETE", f"/posts/{post_id}/reaction", headers=headers))
+        else:
+            action = "dislike" if current == "like" else "like"
+            res = await recorder.call(f"POST /posts/{{post_id}}/{action}", client.request("POST", f"/posts/{post_id}/{action}", headers=headers))
+        if res.status == 200:
+            reactions[worker_id] = action
+
+    return step
+
+
+async def list_reads(client: ASGIClient, run_id: str, concurrency: int, posts: int = 5000, chunk: int = 1000) -> Step:
+    token, _ = await signup(client, f"{run_id}_reader")
+    for offset in range(0, posts, chunk):
+        body = [{"title": f"{run_id} list {n}", "description": "lorem ipsum dolor sit amet " * 8} for n in range(offset, min(offset + chunk, posts))]
+        res = await client.request("POST", "/posts/bulk", json=body, headers=bearer(token))
+        if res.status != 201:
+            raise RuntimeError(f"bulk insert failed: {res.status} {res.body[:200]!r}")
+    user_id = res.json()["created"][0]["user_id"]
+
+    async def step(recorder: Recorder, worker_id: int, i: int):
+        headers = bearer(token)
+        if i % 10 == 0:
+            await recorder.call("GET /posts/?stream=true", client.request("GET", "/posts/", params={"user_id": user_id, "stream": "true"}, headers=headers))
+            return
+        params, pages = {"user_id": user_id, "limit": 500}, 0
+        while pages < 3:
+            res = await recorder.call("GET /posts/", client.request("GET", "/posts/", params=params, headers=headers))
+            next_cursor = res.json().get("next_cursor") if res.status == 200 else None
+            if not next_cursor:
+                break
+            params["cursor"], pages = next_cursor, pages + 1
+
+    return step
+
+
+SCENARIOS: dict[str, Callable[[ASGIClient, str, int], Awaitable[Step]]] = {
+    "auth_churn": auth_churn,
+    "posts_crud": posts_crud,
+    "hot_likes": hot_likes,
+    "list_reads": list_reads,
+}
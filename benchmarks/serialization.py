@@ -0,0 +1,56 @@
+import argparse
+import datetime
+import time
+
+import ujson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import UJSONResponse
+
+from app.controllers.posts import encode_post
+from app.models.posts import Posts
+from app.responses import RawJSONResponse
+from app.schemas.posts import PostResponseSchema
+
+
+def make_posts(count: int) -> list[Posts]:
+    created_at = datetime.datetime(2023, 1, 1)
+    return [
+        Posts(id=i, user_id=i % 100, title=f"title {i}", description="lorem ipsum dolor sit amet " * 8, like_count=i, dislike_count=i // 2, created_at=created_at)
+        for i in range(count)
+    ]
+
+
+def pydantic_path(posts: list[Posts]) -> bytes:
+    return UJSONResponse(jsonable_encoder([PostResponseSchema(**post.__dict__).dict(exclude={"author"}) for post in posts])).body
+
+
+def fast_path(posts: list[Posts]) -> bytes:
+    return RawJSONResponse(ujson.dumps([encode_post(post) for post in posts], ensure_ascii=False).encode()).body
+
+
+def measure(render, posts: list[Posts], repeat: int) -> float:
+    render(posts)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render(posts)
+    return (time.perf_counter() - start) / (repeat * len(posts))
+
+
+def main(rows: int, repeat: int):
+    posts = make_posts(rows)
+    assert ujson.loads(pydantic_path(posts)) == ujson.loads(fast_path(posts))
+
+    current = measure(pydantic_path, posts, repeat)
+    fast = measure(fast_path, posts, repeat)
+
+    print(f"pydantic + UJSONResponse {current * 1e6:10.2f} us/row")
+    print(f"precompiled encoder      {fast * 1e6:10.2f} us/row")
+    print(f"speedup                  {current / fast:10.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-row cost of serializing post responses")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)